@@ -0,0 +1,6 @@
+"""
+Offline benchmarks against a local fixture site.
+
+Run ``python -m benchmarks.run`` to produce a JSON report and
+``python -m benchmarks.compare old.json new.json`` to diff two reports.
+"""
@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Compare two benchmark reports and flag regressions.
+
+Every numeric leaf under ``results`` is compared. Keys ending in ``_ms`` or
+``_bytes`` are better when lower; ``fps``, ``pages_per_sec`` and
+``accuracy`` are better when higher. Other numbers are shown but never
+counted as regressions.
+
+Usage:
+    ./selenium-env/bin/python -m benchmarks.compare baseline.json candidate.json --threshold 0.10
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+from typing import Dict, List, Optional
+
+
+HIGHER_IS_BETTER = ("fps", "pages_per_sec", "accuracy")
+LOWER_IS_BETTER_SUFFIXES = ("_ms", "_bytes")
+
+
+def flatten(node, prefix: str = "") -> Dict[str, float]:
+    flat: Dict[str, float] = {}
+    if isinstance(node, dict):
+        for key, value in node.items():
+            flat.update(flatten(value, f"{prefix}.{key}" if prefix else str(key)))
+    elif isinstance(node, (int, float)) and not isinstance(node, bool):
+        flat[prefix] = float(node)
+    return flat
+
+
+def direction(path: str) -> Optional[int]:
+    """+1 if higher is better, -1 if lower is better, None if neutral."""
+    leaf = path.rsplit(".", 1)[-1]
+    if leaf in HIGHER_IS_BETTER:
+        return 1
+    if leaf.endswith(LOWER_IS_BETTER_SUFFIXES):
+        return -1
+    return None
+
+
+def compare(baseline: dict, candidate: dict, threshold: float) -> List[dict]:
+    old = flatten(baseline.get("results", {}))
+    new = flatten(candidate.get("results", {}))
+    rows = []
+    for path in sorted(old.keys() & new.keys()):
+        before, after = old[path], new[path]
+        change = (after - before) / before if before else 0.0
+        sense = direction(path)
+        regressed = sense is not None and change * sense < -threshold
+        improved = sense is not None and change * sense > threshold
+        rows.append({
+            "metric": path,
+            "baseline": before,
+            "candidate": after,
+            "change": round(change, 4),
+            "status": "REGRESSION" if regressed else "improved" if improved else "",
+        })
+    return rows
+
+
+def main(argv: List[str]) -> int:
+    parser = argparse.ArgumentParser(description="Compare two benchmark JSON reports.")
+    parser.add_argument("baseline")
+    parser.add_argument("candidate")
+    parser.add_argument("--threshold", type=float, default=0.10, help="Relative change to flag (default 0.10)")
+    parser.add_argument("--all", action="store_true", help="Show unchanged metrics too")
+    args = parser.parse_args(argv)
+
+    with open(args.baseline, encoding="utf-8") as fh:
+        baseline = json.load(fh)
+    with open(args.candidate, encoding="utf-8") as fh:
+        candidate = json.load(fh)
+
+    rows = compare(baseline, candidate, args.threshold)
+    shown = rows if args.all else [row for row in rows if row["status"]]
+    width = max([len(row["metric"]) for row in shown] + [6])
+    print(f"baseline:  {baseline.get('meta', {}).get('git_revision')}")
+    print(f"candidate: {candidate.get('meta', {}).get('git_revision')}")
+    for row in shown:
+        print(
+            f"{row['metric']:<{width}}  {row['baseline']:>12.3f} -> {row['candidate']:>12.3f}"
+            f"  {row['change']:+8.1%}  {row['status']}"
+        )
+
+    regressions = sum(1 for row in rows if row["status"] == "REGRESSION")
+    print(f"{regressions} regression(s) over {args.threshold:.0%} in {len(rows)} metrics")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main(sys.argv[1:]))
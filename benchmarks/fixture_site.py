@@ -0,0 +1,150 @@
+"""
+Local HTTP fixture site for offline benchmarks.
+
+Serves deterministic pages on 127.0.0.1 so benchmarks never touch the
+network:
+
+    /static                      small static page
+    /long                        long page for scroll benchmarks
+    /js                          content rendered by JavaScript after load
+    /paginate/<style>/<n>        paginated listing, pages 1..PAGES_PER_STYLE
+
+On pagination pages the correct next-page control carries
+``data-bench="expected-next"``; the last page of each style has none, so
+``find_next_page_button`` accuracy covers both hits and true negatives.
+
+Usage:
+    with FixtureSite() as site:
+        driver.get(site.url("/paginate/rel_next/1"))
+"""
+
+from __future__ import annotations
+
+import html
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Optional
+
+
+PAGES_PER_STYLE = 5
+EXPECTED_NEXT_ATTR = 'data-bench="expected-next"'
+
+# style -> template for the next-page control; {href} and {marker} are filled in
+PAGINATION_STYLES: Dict[str, str] = {
+    "rel_next": '<a href="{href}" rel="next" {marker}>Older posts</a>',
+    "class_next": '<div class="pagination"><a href="{prev}">1</a> <a class="next" href="{href}" {marker}>More</a></div>',
+    "aria_label": '<nav><a href="{href}" aria-label="Next page" {marker}><svg width="10" height="10"></svg></a></nav>',
+    "arrow_raquo": '<div class="pager"><a href="{prev}">«</a> <a href="{href}" {marker}>»</a></div>',
+    "arrow_right": '<a href="{href}" {marker}>→</a>',
+    "text_next": '<ul><li><a href="{prev}">Previous</a></li><li><a href="{href}" {marker}>Next</a></li></ul>',
+    "spanish": '<a href="{href}" {marker}>Siguiente</a>',
+    "french": '<a href="{href}" aria-label="Suivant" {marker}>Page suivante</a>',
+    "german": '<button onclick="location.href=\'{href}\'" {marker}>Weiter</button>',
+    "japanese": '<a href="{href}" {marker}>次へ</a>',
+}
+
+_FILLER = (
+    "Lorem ipsum dolor sit amet, consectetur adipiscing elit, sed do eiusmod "
+    "tempor incididunt ut labore et dolore magna aliqua. "
+)
+
+
+def _page(title: str, body: str) -> str:
+    return (
+        "<!doctype html><html><head><meta charset='utf-8'>"
+        f"<title>{html.escape(title)}</title>"
+        "<style>body{font-family:sans-serif;margin:2em}article{margin:1em 0}</style>"
+        f"</head><body><h1>{html.escape(title)}</h1>{body}</body></html>"
+    )
+
+
+def _listing(count: int, seed: int) -> str:
+    return "".join(
+        f"<article><h2>Item {seed}-{i}</h2><p>{_FILLER * 3}</p></article>" for i in range(count)
+    )
+
+
+def render_path(path: str) -> Optional[str]:
+    """Return the HTML for ``path``, or None for a 404."""
+    if path in ("/", "/static"):
+        return _page("Static fixture", f"<p>{_FILLER}</p>")
+
+    if path == "/long":
+        return _page("Long fixture", _listing(200, 0))
+
+    if path == "/js":
+        script = (
+            "<div id='root'>loading</div><script>"
+            "setTimeout(function(){var r=document.getElementById('root');r.innerHTML='';"
+            "for(var i=0;i<100;i++){var a=document.createElement('article');"
+            f"a.innerHTML='<h2>Rendered '+i+'</h2><p>{_FILLER * 3}</p>';r.appendChild(a);}}"
+            "},50);</script>"
+        )
+        return _page("JS fixture", script)
+
+    parts = path.strip("/").split("/")
+    if len(parts) == 3 and parts[0] == "paginate" and parts[1] in PAGINATION_STYLES:
+        style = parts[1]
+        try:
+            number = int(parts[2])
+        except ValueError:
+            return None
+        if not 1 <= number <= PAGES_PER_STYLE:
+            return None
+        control = ""
+        if number < PAGES_PER_STYLE:
+            control = PAGINATION_STYLES[style].format(
+                href=f"/paginate/{style}/{number + 1}",
+                prev=f"/paginate/{style}/{max(1, number - 1)}",
+                marker=EXPECTED_NEXT_ATTR,
+            )
+        return _page(f"{style} page {number}", _listing(10, number) + control)
+
+    return None
+
+
+class _Handler(BaseHTTPRequestHandler):
+    def do_GET(self):  # noqa: N802 (http.server naming)
+        body = render_path(self.path.split("?", 1)[0])
+        if body is None:
+            self.send_error(404)
+            return
+        data = body.encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class FixtureSite:
+    """Threaded HTTP server bound to an ephemeral port on localhost."""
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0):
+        self._server = ThreadingHTTPServer((host, port), _Handler)
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def url(self, path: str) -> str:
+        return self.base_url + path
+
+    def start(self) -> "FixtureSite":
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self) -> "FixtureSite":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
@@ -0,0 +1,368 @@
+#!/usr/bin/env python3
+"""
+Offline benchmark suite for the capture, pagination and worker paths.
+
+Starts the local fixture site and measures, without any network access:
+
+    capture      screenshot/decode/encode time and fps per resolution x quality,
+                 and screenshot vs. CDP output-size capture CPU/bytes per frame
+    find_next    find_next_page_button latency and accuracy per pagination style,
+                 with and without the per-domain selector cache
+    run_worker   cold (first) vs. warm run_worker latency
+    crawl        auto-next crawl throughput in pages/sec
+
+Results are written as JSON for comparison between commits with
+``python -m benchmarks.compare``.
+
+Usage:
+    ./selenium-env/bin/python -m benchmarks.run --output bench_results.json
+    ./selenium-env/bin/python -m benchmarks.run --only capture,find_next --frames 20
+"""
+
+from __future__ import annotations
+
+import argparse
+import io
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from PIL import Image
+from selenium.webdriver.support.ui import WebDriverWait
+
+from benchmarks.fixture_site import (
+    EXPECTED_NEXT_ATTR,
+    PAGES_PER_STYLE,
+    PAGINATION_STYLES,
+    FixtureSite,
+)
+from cdp_capture import CdpCapture
+from crawl_frontier import CrawlFrontier
+from human_behavior import HumanBehavior
+from human_timing import PROFILES
+from selector_cache import SelectorCache
+from selenium_worker import create_driver, fetch_page
+
+
+ALL_BENCHMARKS = ("run_worker", "capture", "find_next", "crawl")
+DEFAULT_RESOLUTIONS = "1920x1080,1280x720,854x480"
+DEFAULT_QUALITIES = "50,70,85"
+
+
+def summarize(samples_ms: Sequence[float]) -> dict:
+    """Mean/percentile summary of a list of millisecond samples."""
+    if not samples_ms:
+        return {"n": 0}
+    ordered = sorted(samples_ms)
+
+    def pct(p: float) -> float:
+        return ordered[min(len(ordered) - 1, int(round(p * (len(ordered) - 1))))]
+
+    return {
+        "n": len(ordered),
+        "mean_ms": round(statistics.fmean(ordered), 3),
+        "p50_ms": round(pct(0.5), 3),
+        "p95_ms": round(pct(0.95), 3),
+        "min_ms": round(ordered[0], 3),
+        "max_ms": round(ordered[-1], 3),
+    }
+
+
+def _elapsed_ms(started: float) -> float:
+    return (time.perf_counter() - started) * 1000
+
+
+def _parse_resolutions(value: str) -> List[Tuple[int, int]]:
+    resolutions = []
+    for item in value.split(","):
+        width, height = item.lower().split("x")
+        resolutions.append((int(width), int(height)))
+    return resolutions
+
+
+# ---------------------------------------------------------------------- #
+# Benchmarks
+# ---------------------------------------------------------------------- #
+
+def bench_capture(
+    driver,
+    site: FixtureSite,
+    resolutions: Sequence[Tuple[int, int]],
+    qualities: Sequence[int],
+    frames: int,
+) -> dict:
+    """Same pipeline as ``_capture_frame()``: PNG screenshot -> PIL decode -> JPEG."""
+    driver.get(site.url("/long"))
+    results = {}
+    for width, height in resolutions:
+        driver.set_window_size(width, height)
+        for quality in qualities:
+            screenshot_ms, decode_ms, encode_ms, frame_bytes = [], [], [], []
+            started_all = time.perf_counter()
+            for i in range(frames):
+                driver.execute_script("window.scrollBy(0, 200);")
+
+                started = time.perf_counter()
+                png_bytes = driver.get_screenshot_as_png()
+                screenshot_ms.append(_elapsed_ms(started))
+
+                started = time.perf_counter()
+                image = Image.open(io.BytesIO(png_bytes))
+                image.load()
+                decode_ms.append(_elapsed_ms(started))
+
+                started = time.perf_counter()
+                buffer = io.BytesIO()
+                image.save(buffer, format="JPEG", quality=quality, optimize=True)
+                encode_ms.append(_elapsed_ms(started))
+                frame_bytes.append(len(buffer.getvalue()))
+            total_s = time.perf_counter() - started_all
+
+            results[f"{width}x{height}@q{quality}"] = {
+                "fps": round(frames / total_s, 3) if total_s else None,
+                "screenshot": summarize(screenshot_ms),
+                "decode": summarize(decode_ms),
+                "encode": summarize(encode_ms),
+                "mean_frame_bytes": int(statistics.fmean(frame_bytes)),
+            }
+    return results
+
+
+def bench_capture_output_size(
+    driver,
+    site: FixtureSite,
+    outputs: Sequence[Tuple[int, int]],
+    qualities: Sequence[int],
+    frames: int,
+) -> dict:
+    """
+    Screenshot path (full PNG -> thumbnail -> JPEG) vs. CdpCapture rendering
+    directly at each output size, from a 1920x1080 window.
+    """
+    driver.set_window_size(1920, 1080)
+    driver.get(site.url("/long"))
+    results = {}
+    for width, height in outputs:
+        for quality in qualities:
+            capture = CdpCapture(driver, max_width=width, max_height=height, quality=quality)
+            row = {}
+            for path in ("screenshot", "cdp"):
+                python_cpu_ms, wall_ms, frame_bytes = [], [], []
+                for _ in range(frames):
+                    driver.execute_script("window.scrollBy(0, 200);")
+                    cpu_started = time.thread_time()
+                    started = time.perf_counter()
+                    if path == "cdp":
+                        frame = capture.capture()
+                    else:
+                        image = Image.open(io.BytesIO(driver.get_screenshot_as_png()))
+                        if image.width > width or image.height > height:
+                            image.thumbnail((width, height))
+                        buffer = io.BytesIO()
+                        image.save(buffer, format="JPEG", quality=quality, optimize=True)
+                        frame = buffer.getvalue()
+                    wall_ms.append(_elapsed_ms(started))
+                    python_cpu_ms.append((time.thread_time() - cpu_started) * 1000)
+                    frame_bytes.append(len(frame))
+                row[path] = {
+                    # Thread CPU of this process; Chrome-side encoding in the cdp path is not included
+                    "python_cpu": summarize(python_cpu_ms),
+                    "wall": summarize(wall_ms),
+                    "mean_frame_bytes": int(statistics.fmean(frame_bytes)),
+                }
+            capture.reset()
+            results[f"{width}x{height}@q{quality}"] = row
+    return results
+
+
+def bench_find_next(driver, site: FixtureSite, repeats: int, cached: bool = False) -> dict:
+    """
+    Latency and accuracy of ``find_next_page_button`` on every pagination style.
+    With ``cached`` the per-domain selector cache is enabled (all styles share
+    the fixture's host, so each style starts by relearning its locator).
+    """
+    human = HumanBehavior(driver, selector_cache=SelectorCache() if cached else None)
+    results = {}
+    total_correct = total_checks = 0
+    for style in PAGINATION_STYLES:
+        latencies: List[float] = []
+        correct = checks = 0
+        for number in range(1, PAGES_PER_STYLE + 1):
+            driver.get(site.url(f"/paginate/{style}/{number}"))
+            expect_next = number < PAGES_PER_STYLE
+            for _ in range(repeats):
+                started = time.perf_counter()
+                element = human.find_next_page_button()
+                latencies.append(_elapsed_ms(started))
+                if element is None:
+                    hit = not expect_next
+                else:
+                    hit = expect_next and element.get_attribute("data-bench") == "expected-next"
+                correct += int(hit)
+                checks += 1
+        total_correct += correct
+        total_checks += checks
+        results[style] = {
+            "latency": summarize(latencies),
+            "accuracy": round(correct / checks, 3),
+        }
+    report = {
+        "styles": results,
+        "accuracy": round(total_correct / total_checks, 3) if total_checks else None,
+        "expected_marker": EXPECTED_NEXT_ATTR,
+    }
+    if cached:
+        cache_stats = human.selector_cache.stats()
+        report["cache"] = {key: cache_stats[key] for key in ("hits", "misses", "learned", "invalidated", "hit_rate")}
+    return report
+
+
+def bench_run_worker(site: FixtureSite, runs: int) -> dict:
+    """First ``run_worker`` call (cold caches) vs. the following ones, per page type."""
+    keys = ("driver_start_ms", "get_ms", "total_ms")
+    cold = fetch_page(site.url("/static"), proxy_url=None)["timings"]
+    warm = {}
+    for path in ("/static", "/js"):
+        samples = [fetch_page(site.url(path), proxy_url=None)["timings"] for _ in range(max(1, runs))]
+        warm[path] = {key: summarize([sample[key] for sample in samples]) for key in keys}
+    return {"cold": {key: cold[key] for key in keys}, "warm": warm}
+
+
+def bench_crawl(driver, site: FixtureSite, style: str, scrolls: int, profile: str) -> dict:
+    """Auto-next loop over one pagination chain: scroll, find next, click."""
+    human = HumanBehavior(driver, frontier=CrawlFrontier(), profile=profile)
+    driver.get(site.url(f"/paginate/{style}/1"))
+    human.frontier.mark_visited(driver.current_url)
+    page_ms: List[float] = []
+    pages = 1
+    started_all = time.perf_counter()
+    while True:
+        started = time.perf_counter()
+        if scrolls:
+            human.scroll_down_slowly(num_scrolls=scrolls, scroll_percentage=0.3)
+        button = human.find_next_page_button()
+        href = human.get_href(button) if button else None
+        if button is None or (href and human.frontier.is_visited(href)):
+            break
+        previous_url = driver.current_url
+        human.human_click(button)
+        WebDriverWait(driver, 10, poll_frequency=0.05).until(lambda d: d.current_url != previous_url)
+        pages += int(human.frontier.mark_visited(driver.current_url))
+        page_ms.append(_elapsed_ms(started))
+    total_s = time.perf_counter() - started_all
+    return {
+        "style": style,
+        "profile": profile,
+        "pages": pages,
+        "expected_pages": PAGES_PER_STYLE,
+        "pages_per_sec": round(pages / total_s, 4) if total_s else None,
+        "per_page": summarize(page_ms),
+        "simulated_seconds": round(human.simulated_seconds, 3),
+    }
+
+
+# ---------------------------------------------------------------------- #
+# Entry point
+# ---------------------------------------------------------------------- #
+
+def _git_revision() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+            cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run(args: argparse.Namespace) -> dict:
+    selected = [name for name in args.only.split(",") if name] if args.only else list(ALL_BENCHMARKS)
+    unknown = set(selected) - set(ALL_BENCHMARKS)
+    if unknown:
+        raise SystemExit(f"Unknown benchmark(s): {', '.join(sorted(unknown))}")
+
+    report: Dict[str, object] = {
+        "meta": {
+            "git_revision": _git_revision(),
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "python": sys.version.split()[0],
+            "platform": platform.platform(),
+            "selected": selected,
+            "params": {
+                "frames": args.frames,
+                "repeats": args.repeats,
+                "worker_runs": args.worker_runs,
+                "resolutions": args.resolutions,
+                "qualities": args.qualities,
+                "crawl_style": args.crawl_style,
+                "crawl_scrolls": args.crawl_scrolls,
+                "crawl_profile": args.crawl_profile,
+            },
+        },
+        "results": {},
+    }
+    results = report["results"]
+
+    with FixtureSite() as site:
+        # run_worker starts its own browsers; run it before opening the shared
+        # driver so the two never hold Chrome's debugging port at the same time.
+        if "run_worker" in selected:
+            results["run_worker"] = bench_run_worker(site, args.worker_runs)
+
+        if {"capture", "find_next", "crawl"} & set(selected):
+            with create_driver(None) as driver:
+                if "capture" in selected:
+                    resolutions = _parse_resolutions(args.resolutions)
+                    qualities = [int(q) for q in args.qualities.split(",")]
+                    results["capture"] = bench_capture(driver, site, resolutions, qualities, args.frames)
+                    results["capture_output_size"] = bench_capture_output_size(
+                        driver, site, resolutions, qualities, args.frames
+                    )
+                driver.set_window_size(1920, 1080)
+                if "find_next" in selected:
+                    results["find_next"] = bench_find_next(driver, site, args.repeats)
+                    results["find_next_cached"] = bench_find_next(driver, site, args.repeats, cached=True)
+                if "crawl" in selected:
+                    results["crawl"] = bench_crawl(
+                        driver, site, args.crawl_style, args.crawl_scrolls, args.crawl_profile
+                    )
+
+    return report
+
+
+def main(argv: List[str]) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    parser.add_argument("--output", "-o", default="bench_results.json", help="JSON results path ('-' for stdout)")
+    parser.add_argument("--only", help=f"Comma-separated subset of: {', '.join(ALL_BENCHMARKS)}")
+    parser.add_argument("--frames", type=int, default=10, help="Frames per resolution/quality")
+    parser.add_argument("--repeats", type=int, default=3, help="find_next_page_button calls per page")
+    parser.add_argument("--worker-runs", type=int, default=3, help="Warm run_worker calls per page type")
+    parser.add_argument("--resolutions", default=DEFAULT_RESOLUTIONS)
+    parser.add_argument("--qualities", default=DEFAULT_QUALITIES)
+    parser.add_argument("--crawl-style", default="rel_next", choices=sorted(PAGINATION_STYLES))
+    parser.add_argument("--crawl-scrolls", type=int, default=1, help="scroll_down_slowly steps per page")
+    parser.add_argument("--crawl-profile", default="human", choices=sorted(PROFILES), help="HumanBehavior timing profile")
+    args = parser.parse_args(argv)
+
+    report = run(args)
+    text = json.dumps(report, indent=2)
+    if args.output == "-":
+        sys.stdout.write(text + "\n")
+    else:
+        with open(args.output, "w", encoding="utf-8") as fh:
+            fh.write(text + "\n")
+        sys.stderr.write(f"[benchmarks] wrote {args.output}\n")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main(sys.argv[1:]))
@@ -0,0 +1,192 @@
+#!/usr/bin/env python3
+"""
+DevTools capture that renders frames at the output size, directly as JPEG.
+
+The default stream path takes a full-window PNG, decodes it with PIL,
+thumbnails it and re-encodes JPEG. :class:`CdpCapture` instead pins the
+device metrics (so hiDPI hosts don't double the pixel count) and calls
+``Page.captureScreenshot`` with ``format=jpeg``, a quality, and a clip whose
+``scale`` shrinks the region to fit ``max_width x max_height``. Chrome does
+the scaling and encoding; Python only base64-decodes the result.
+
+The clip can be the visible viewport or the bounding box of a CSS
+selector. :class:`CaptureStats` keeps per-path Python CPU, wall time and
+bytes per frame so both paths can be compared from the service's metadata.
+The CPU figure is this process's thread time only: in the cdp path the JPEG
+encode runs inside Chrome and is not counted, so ``python_cpu_ratio`` shows
+the work moved out of Python, not total savings (compare ``wall_ratio``).
+
+Usage:
+    capture = CdpCapture(driver, max_width=960, max_height=540, quality=70)
+    jpeg = capture.capture()
+"""
+
+from __future__ import annotations
+
+import base64
+import threading
+from typing import Dict, Optional
+
+from selenium.common.exceptions import WebDriverException
+
+
+_GEOMETRY_SCRIPT = """
+const geometry = {
+    x: window.scrollX, y: window.scrollY,
+    width: window.innerWidth, height: window.innerHeight,
+};
+const selector = arguments[0];
+if (selector) {
+    const element = document.querySelector(selector);
+    if (element) {
+        const rect = element.getBoundingClientRect();
+        if (rect.width > 0 && rect.height > 0) {
+            geometry.element = {
+                x: rect.left + window.scrollX, y: rect.top + window.scrollY,
+                width: rect.width, height: rect.height,
+            };
+        }
+    }
+}
+return geometry;
+"""
+
+
+class CdpUnavailable(Exception):
+    """The driver cannot run DevTools commands (e.g. a non-Chromium remote)."""
+
+
+class CdpCapture:
+    """Scaled, clipped JPEG screenshots through the DevTools protocol."""
+
+    REGIONS = ("viewport", "element")
+
+    def __init__(
+        self,
+        driver,
+        max_width: int,
+        max_height: int,
+        quality: int = 85,
+        region: str = "viewport",
+        selector: Optional[str] = None,
+    ):
+        if region not in self.REGIONS:
+            raise ValueError(f"region must be one of {', '.join(self.REGIONS)}")
+        self.driver = driver
+        self.max_width = max_width
+        self.max_height = max_height
+        self.quality = max(1, min(100, quality))
+        self.region = region
+        self.selector = selector
+        self._metrics_applied = False
+        self.last_size = None
+
+    def _cdp(self, command: str, params: dict) -> dict:
+        execute_cdp_cmd = getattr(self.driver, "execute_cdp_cmd", None)
+        if execute_cdp_cmd is None:
+            raise CdpUnavailable(f"{type(self.driver).__name__} has no execute_cdp_cmd")
+        return execute_cdp_cmd(command, params)
+
+    def apply_device_metrics(self) -> None:
+        """Pin the viewport at its current CSS size with a device scale factor of 1."""
+        geometry = self.driver.execute_script(_GEOMETRY_SCRIPT, None)
+        self._cdp(
+            "Emulation.setDeviceMetricsOverride",
+            {
+                "width": int(geometry["width"]),
+                "height": int(geometry["height"]),
+                "deviceScaleFactor": 1,
+                "mobile": False,
+            },
+        )
+        self._metrics_applied = True
+
+    def reset(self) -> None:
+        """Drop the emulation override (e.g. after the window was resized)."""
+        if self._metrics_applied:
+            self._cdp("Emulation.clearDeviceMetricsOverride", {})
+            self._metrics_applied = False
+
+    def _clip(self) -> dict:
+        selector = self.selector if self.region == "element" else None
+        geometry = self.driver.execute_script(_GEOMETRY_SCRIPT, selector)
+        box = geometry.get("element") or geometry
+        width = max(1.0, float(box["width"]))
+        height = max(1.0, float(box["height"]))
+        scale = min(self.max_width / width, self.max_height / height, 1.0)
+        return {
+            "x": float(box["x"]),
+            "y": float(box["y"]),
+            "width": width,
+            "height": height,
+            "scale": scale,
+        }
+
+    def capture(self) -> bytes:
+        """Return one JPEG frame no larger than ``max_width x max_height``."""
+        if not self._metrics_applied:
+            self.apply_device_metrics()
+        clip = self._clip()
+        result = self._cdp(
+            "Page.captureScreenshot",
+            {
+                "format": "jpeg",
+                "quality": self.quality,
+                "clip": clip,
+                "fromSurface": True,
+                "captureBeyondViewport": False,
+            },
+        )
+        self.last_size = (round(clip["width"] * clip["scale"]), round(clip["height"] * clip["scale"]))
+        return base64.b64decode(result["data"])
+
+
+def create_cdp_capture(driver, **kwargs) -> Optional[CdpCapture]:
+    """Build a CdpCapture, or return None (with a log line) if DevTools is unavailable."""
+    capture = CdpCapture(driver, **kwargs)
+    try:
+        capture.apply_device_metrics()
+    except (CdpUnavailable, WebDriverException) as exc:
+        print(f"CDP capture unavailable, using screenshot path: {exc}")
+        return None
+    return capture
+
+
+class CaptureStats:
+    """Running per-path averages of Python CPU time, wall time and bytes per frame."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._paths: Dict[str, list] = {}
+
+    def record(self, path: str, python_cpu_seconds: float, wall_seconds: float, size: int) -> None:
+        with self._lock:
+            totals = self._paths.setdefault(path, [0, 0.0, 0.0, 0])
+            totals[0] += 1
+            totals[1] += python_cpu_seconds
+            totals[2] += wall_seconds
+            totals[3] += size
+
+    def summary(self) -> dict:
+        with self._lock:
+            paths = {
+                path: {
+                    "frames": frames,
+                    "python_cpu_ms_per_frame": round(cpu / frames * 1000, 3),
+                    "wall_ms_per_frame": round(wall / frames * 1000, 3),
+                    "bytes_per_frame": int(size / frames),
+                }
+                for path, (frames, cpu, wall, size) in self._paths.items()
+                if frames
+            }
+        if "cdp" in paths and "screenshot" in paths:
+            cdp, legacy = paths["cdp"], paths["screenshot"]
+            paths["cdp_vs_screenshot"] = {
+                "python_cpu_ratio": round(cdp["python_cpu_ms_per_frame"] / legacy["python_cpu_ms_per_frame"], 3)
+                if legacy["python_cpu_ms_per_frame"] else None,
+                "bytes_ratio": round(cdp["bytes_per_frame"] / legacy["bytes_per_frame"], 3)
+                if legacy["bytes_per_frame"] else None,
+                "wall_ratio": round(cdp["wall_ms_per_frame"] / legacy["wall_ms_per_frame"], 3)
+                if legacy["wall_ms_per_frame"] else None,
+            }
+        return paths
@@ -0,0 +1,370 @@
+#!/usr/bin/env python3
+"""
+Append-only compressed archive of crawled pages.
+
+Pages are stored as zlib-compressed JSON records in numbered segment files.
+A fixed-width index maps URL hash and fetch time to the segment offset, so
+lookups never scan segment data. Segments are read through mmap, and writers
+in several threads or processes coordinate through an flock'd lock file.
+
+Layout::
+
+    <root>/segment-000001.dat   records: header + zlib(JSON)
+    <root>/index.bin            32-byte entries, one per record
+    <root>/.lock                writer lock
+
+Usage:
+    archive = CrawlArchive("crawl_archive")
+    archive.put({"url": url, "fetched_at": time.time(), "html": html})
+    latest = archive.get(url)
+"""
+
+from __future__ import annotations
+
+import bisect
+import fcntl
+import hashlib
+import json
+import mmap
+import os
+import struct
+import threading
+import time
+import zlib
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from crawl_frontier import normalize_url
+
+
+SEGMENT_PREFIX = "segment-"
+SEGMENT_SUFFIX = ".dat"
+INDEX_NAME = "index.bin"
+LOCK_NAME = ".lock"
+
+# magic, crc32 of the compressed payload, compressed length
+_RECORD_HEADER = struct.Struct("<4sII")
+_RECORD_MAGIC = b"WCA1"
+# url hash, fetched_at, segment id, offset, record length (header included)
+_INDEX_ENTRY = struct.Struct("<QdIQI")
+
+
+class ArchiveError(Exception):
+    """Raised when a record cannot be read back intact."""
+
+
+@dataclass(frozen=True)
+class IndexEntry:
+    url_hash: int
+    fetched_at: float
+    segment: int
+    offset: int
+    length: int
+
+
+def url_hash(url: str) -> int:
+    digest = hashlib.blake2b(normalize_url(url).encode("utf-8"), digest_size=8).digest()
+    return int.from_bytes(digest, "little")
+
+
+class CrawlArchive:
+    """Segmented, compressed, append-only page store with a URL/time index."""
+
+    def __init__(
+        self,
+        root: str,
+        segment_max_bytes: int = 256 * 1024 * 1024,
+        compression_level: int = 6,
+    ):
+        self.root = root
+        self.segment_max_bytes = segment_max_bytes
+        self.compression_level = compression_level
+        os.makedirs(root, exist_ok=True)
+
+        self._thread_lock = threading.Lock()
+        self._index_path = os.path.join(root, INDEX_NAME)
+        self._lock_path = os.path.join(root, LOCK_NAME)
+        self._by_url: Dict[int, List[IndexEntry]] = {}
+        self._by_time: List[Tuple[float, int]] = []
+        self._entries: List[IndexEntry] = []
+        self._index_pos = 0
+        self._index_inode: Optional[int] = None
+        self._maps: Dict[int, Tuple[int, mmap.mmap]] = {}
+
+        with self._thread_lock:
+            self._refresh_index()
+
+    # ------------------------------------------------------------------ #
+    # Locking and index maintenance
+    # ------------------------------------------------------------------ #
+
+    @contextmanager
+    def _file_lock(self, exclusive: bool = True):
+        with open(self._lock_path, "a+") as fh:
+            fcntl.flock(fh, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+            try:
+                yield
+            finally:
+                fcntl.flock(fh, fcntl.LOCK_UN)
+
+    def _reset_index(self) -> None:
+        self._by_url.clear()
+        self._by_time.clear()
+        self._entries.clear()
+        self._index_pos = 0
+        for _, mapped in self._maps.values():
+            mapped.close()
+        self._maps.clear()
+
+    def _add_entry(self, entry: IndexEntry) -> None:
+        self._by_url.setdefault(entry.url_hash, []).append(entry)
+        position = len(self._entries)
+        self._entries.append(entry)
+        if self._by_time and entry.fetched_at < self._by_time[-1][0]:
+            bisect.insort(self._by_time, (entry.fetched_at, position))
+        else:
+            self._by_time.append((entry.fetched_at, position))
+
+    def _refresh_index(self) -> None:
+        """Pick up index entries appended by other writers. Caller holds the thread lock."""
+        try:
+            stat = os.stat(self._index_path)
+        except FileNotFoundError:
+            self._reset_index()
+            self._index_inode = None
+            return
+
+        if stat.st_ino != self._index_inode:
+            # First load, or another process compacted and swapped the index
+            self._reset_index()
+            self._index_inode = stat.st_ino
+
+        if stat.st_size <= self._index_pos:
+            return
+
+        with open(self._index_path, "rb") as fh:
+            fh.seek(self._index_pos)
+            data = fh.read(stat.st_size - self._index_pos)
+
+        usable = len(data) - len(data) % _INDEX_ENTRY.size
+        for fields in _INDEX_ENTRY.iter_unpack(data[:usable]):
+            self._add_entry(IndexEntry(*fields))
+        self._index_pos += usable
+
+    # ------------------------------------------------------------------ #
+    # Segments
+    # ------------------------------------------------------------------ #
+
+    def _segment_path(self, segment: int) -> str:
+        return os.path.join(self.root, f"{SEGMENT_PREFIX}{segment:06d}{SEGMENT_SUFFIX}")
+
+    def segments(self) -> List[int]:
+        ids = []
+        for name in os.listdir(self.root):
+            if name.startswith(SEGMENT_PREFIX) and name.endswith(SEGMENT_SUFFIX):
+                try:
+                    ids.append(int(name[len(SEGMENT_PREFIX):-len(SEGMENT_SUFFIX)]))
+                except ValueError:
+                    continue
+        return sorted(ids)
+
+    def _active_segment(self, incoming: int) -> int:
+        ids = self.segments()
+        if not ids:
+            return 1
+        current = ids[-1]
+        size = os.path.getsize(self._segment_path(current))
+        if size and size + incoming > self.segment_max_bytes:
+            return current + 1
+        return current
+
+    def _segment_map(self, segment: int, needed: int) -> mmap.mmap:
+        """Return an mmap covering at least ``needed`` bytes of the segment."""
+        cached = self._maps.get(segment)
+        if cached and cached[0] >= needed:
+            return cached[1]
+        if cached:
+            cached[1].close()
+        with open(self._segment_path(segment), "rb") as fh:
+            size = os.fstat(fh.fileno()).st_size
+            mapped = mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ)
+        self._maps[segment] = (size, mapped)
+        return mapped
+
+    # ------------------------------------------------------------------ #
+    # Encoding
+    # ------------------------------------------------------------------ #
+
+    def _encode(self, record: dict) -> bytes:
+        payload = zlib.compress(
+            json.dumps(record, separators=(",", ":")).encode("utf-8"),
+            self.compression_level,
+        )
+        return _RECORD_HEADER.pack(_RECORD_MAGIC, zlib.crc32(payload), len(payload)) + payload
+
+    @staticmethod
+    def _decode(buf, offset: int) -> dict:
+        magic, crc, length = _RECORD_HEADER.unpack_from(buf, offset)
+        if magic != _RECORD_MAGIC:
+            raise ArchiveError(f"bad record magic at offset {offset}")
+        start = offset + _RECORD_HEADER.size
+        payload = buf[start:start + length]
+        if len(payload) != length or zlib.crc32(payload) != crc:
+            raise ArchiveError(f"corrupt record at offset {offset}")
+        return json.loads(zlib.decompress(payload))
+
+    # ------------------------------------------------------------------ #
+    # Public API
+    # ------------------------------------------------------------------ #
+
+    def put(self, record: dict) -> IndexEntry:
+        """
+        Append a page record. ``record`` must contain ``url``; ``fetched_at``
+        (epoch seconds) defaults to now. Any other JSON-serializable fields
+        (html, extracted data, headers, timings) are stored as-is.
+        """
+        if "url" not in record:
+            raise ValueError("record requires a 'url'")
+        record = dict(record)
+        record.setdefault("fetched_at", time.time())
+        # Compress before taking any lock so concurrent writers overlap on CPU
+        blob = self._encode(record)
+
+        with self._thread_lock, self._file_lock():
+            segment = self._active_segment(len(blob))
+            with open(self._segment_path(segment), "ab") as fh:
+                offset = fh.seek(0, os.SEEK_END)
+                fh.write(blob)
+            entry = IndexEntry(
+                url_hash(record["url"]),
+                float(record["fetched_at"]),
+                segment,
+                offset,
+                len(blob),
+            )
+            with open(self._index_path, "ab") as fh:
+                fh.write(_INDEX_ENTRY.pack(
+                    entry.url_hash, entry.fetched_at, entry.segment, entry.offset, entry.length
+                ))
+            self._refresh_index()
+        return entry
+
+    def read(self, entry: IndexEntry) -> dict:
+        with self._thread_lock:
+            mapped = self._segment_map(entry.segment, entry.offset + entry.length)
+            return self._decode(mapped, entry.offset)
+
+    def versions(self, url: str) -> List[IndexEntry]:
+        """All index entries for ``url``, oldest first."""
+        key = url_hash(url)
+        with self._thread_lock:
+            self._refresh_index()
+            return sorted(self._by_url.get(key, []), key=lambda e: e.fetched_at)
+
+    def get(self, url: str, at: Optional[float] = None) -> Optional[dict]:
+        """Latest record for ``url``, or the latest fetched at or before ``at``."""
+        normalized = normalize_url(url)
+        for entry in reversed(self.versions(url)):
+            if at is not None and entry.fetched_at > at:
+                continue
+            record = self.read(entry)
+            # Guard against 64-bit hash collisions
+            if normalize_url(record["url"]) == normalized:
+                return record
+        return None
+
+    def iter_range(self, start: float = 0.0, end: Optional[float] = None) -> Iterator[dict]:
+        """Yield records fetched in ``[start, end)`` in fetch-time order."""
+        with self._thread_lock:
+            self._refresh_index()
+            lo = bisect.bisect_left(self._by_time, (start, -1))
+            hi = len(self._by_time) if end is None else bisect.bisect_left(self._by_time, (end, -1))
+            selected = [self._entries[pos] for _, pos in self._by_time[lo:hi]]
+        for entry in selected:
+            yield self.read(entry)
+
+    def compact(self, keep_versions: int = 1, before: Optional[float] = None) -> dict:
+        """
+        Rewrite the archive keeping the newest ``keep_versions`` records per URL.
+        Records fetched at or after ``before`` are always kept.
+
+        Returns:
+            Bytes and record counts before and after compaction.
+        """
+        if keep_versions < 1:
+            raise ValueError("keep_versions must be at least 1")
+        with self._thread_lock, self._file_lock():
+            self._refresh_index()
+            old_segments = self.segments()
+            bytes_before = sum(os.path.getsize(self._segment_path(s)) for s in old_segments)
+            records_before = len(self._entries)
+
+            keep: List[IndexEntry] = []
+            for entries in self._by_url.values():
+                ordered = sorted(entries, key=lambda e: e.fetched_at, reverse=True)
+                for rank, entry in enumerate(ordered):
+                    if rank < keep_versions or (before is not None and entry.fetched_at >= before):
+                        keep.append(entry)
+            keep.sort(key=lambda e: (e.fetched_at, e.segment, e.offset))
+
+            next_segment = (old_segments[-1] if old_segments else 0) + 1
+            segment, written = next_segment, 0
+            new_entries: List[IndexEntry] = []
+            tmp_index = self._index_path + ".tmp"
+            out = open(self._segment_path(segment), "ab")
+            try:
+                with open(tmp_index, "wb") as index_fh:
+                    for entry in keep:
+                        mapped = self._segment_map(entry.segment, entry.offset + entry.length)
+                        blob = mapped[entry.offset:entry.offset + entry.length]
+                        if written and written + len(blob) > self.segment_max_bytes:
+                            out.close()
+                            segment, written = segment + 1, 0
+                            out = open(self._segment_path(segment), "ab")
+                        moved = IndexEntry(entry.url_hash, entry.fetched_at, segment, written, len(blob))
+                        out.write(blob)
+                        written += len(blob)
+                        index_fh.write(_INDEX_ENTRY.pack(
+                            moved.url_hash, moved.fetched_at, moved.segment, moved.offset, moved.length
+                        ))
+                        new_entries.append(moved)
+                    index_fh.flush()
+                    os.fsync(index_fh.fileno())
+                out.flush()
+                os.fsync(out.fileno())
+            finally:
+                out.close()
+
+            os.replace(tmp_index, self._index_path)
+            self._reset_index()
+            for old in old_segments:
+                os.remove(self._segment_path(old))
+            self._refresh_index()
+
+            bytes_after = sum(os.path.getsize(self._segment_path(s)) for s in self.segments())
+            return {
+                "records_before": records_before,
+                "records_after": len(new_entries),
+                "bytes_before": bytes_before,
+                "bytes_after": bytes_after,
+                "segments": self.segments(),
+            }
+
+    def stats(self) -> dict:
+        with self._thread_lock:
+            self._refresh_index()
+            ids = self.segments()
+            return {
+                "root": self.root,
+                "records": len(self._entries),
+                "urls": len(self._by_url),
+                "segments": len(ids),
+                "bytes": sum(os.path.getsize(self._segment_path(s)) for s in ids),
+            }
+
+    def close(self) -> None:
+        with self._thread_lock:
+            for _, mapped in self._maps.values():
+                mapped.close()
+            self._maps.clear()
@@ -0,0 +1,333 @@
+#!/usr/bin/env python3
+"""
+Persistent crawl frontier for the auto-next and navigation loops.
+
+Keeps a compact seen-set of normalized URLs, a priority queue of discovered
+pagination links and outlinks, and per-host depth/page limits. Every change
+is appended to a JSON-lines log so a restarted process resumes where it
+stopped.
+
+Usage:
+    frontier = CrawlFrontier("crawl_frontier.jsonl", max_pages_per_host=500)
+    if frontier.mark_visited(driver.current_url):
+        page_count += 1
+"""
+
+from __future__ import annotations
+
+import hashlib
+import heapq
+import json
+import math
+import os
+import time
+from dataclasses import dataclass, field
+from threading import Lock
+from typing import Dict, Iterator, List, Optional, Tuple
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+
+PAGINATION_PRIORITY = 0
+OUTLINK_PRIORITY = 10
+
+_DEFAULT_PORTS = {"http": 80, "https": 443}
+_TRACKING_PREFIXES = ("utm_",)
+_TRACKING_PARAMS = {"fbclid", "gclid", "mc_cid", "mc_eid", "ref_src"}
+
+
+def normalize_url(url: str) -> str:
+    """
+    Canonicalize a URL so trivially different spellings share one key.
+
+    Raises ValueError for URLs that cannot be parsed (bad port, broken IPv6 host).
+    """
+    parts = urlsplit(url.strip())
+    scheme = parts.scheme.lower()
+    host = (parts.hostname or "").lower()
+    port = parts.port
+    netloc = host
+    if port and _DEFAULT_PORTS.get(scheme) != port:
+        netloc = f"{host}:{port}"
+
+    path = parts.path or "/"
+    if len(path) > 1 and path.endswith("/"):
+        path = path.rstrip("/")
+
+    query = [
+        (key, value)
+        for key, value in parse_qsl(parts.query, keep_blank_values=True)
+        if key not in _TRACKING_PARAMS and not key.startswith(_TRACKING_PREFIXES)
+    ]
+    query.sort()
+
+    return urlunsplit((scheme, netloc, path, urlencode(query), ""))
+
+
+def url_host(url: str) -> str:
+    try:
+        return (urlsplit(url).hostname or "").lower()
+    except ValueError:
+        return ""
+
+
+def _crawl_key(url: str) -> Optional[str]:
+    """Normalized http(s) URL, or None if ``url`` cannot be crawled."""
+    try:
+        key = normalize_url(url)
+    except ValueError:
+        return None
+    return key if key.startswith(("http://", "https://")) else None
+
+
+class BloomFilter:
+    """Fixed-size Bloom filter over strings using double hashing."""
+
+    def __init__(self, capacity: int = 1_000_000, error_rate: float = 0.001):
+        capacity = max(1, capacity)
+        error_rate = min(max(error_rate, 1e-9), 0.5)
+        num_bits = int(-capacity * math.log(error_rate) / (math.log(2) ** 2))
+        self.num_bits = max(8, num_bits)
+        self.num_hashes = max(1, round(self.num_bits / capacity * math.log(2)))
+        self._bits = bytearray((self.num_bits + 7) // 8)
+
+    def _positions(self, key: str) -> Iterator[int]:
+        digest = hashlib.blake2b(key.encode("utf-8"), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        for i in range(self.num_hashes):
+            yield (h1 + i * h2) % self.num_bits
+
+    def add(self, key: str) -> bool:
+        """Insert ``key``; return True if it was not already present."""
+        added = False
+        for pos in self._positions(key):
+            byte, bit = divmod(pos, 8)
+            mask = 1 << bit
+            if not self._bits[byte] & mask:
+                self._bits[byte] |= mask
+                added = True
+        return added
+
+    def __contains__(self, key: str) -> bool:
+        return all(
+            self._bits[pos // 8] & (1 << (pos % 8)) for pos in self._positions(key)
+        )
+
+    @property
+    def size_bytes(self) -> int:
+        return len(self._bits)
+
+
+@dataclass(order=True)
+class FrontierEntry:
+    priority: int
+    seq: int
+    url: str = field(compare=False)
+    depth: int = field(default=0, compare=False)
+    source: Optional[str] = field(default=None, compare=False)
+
+
+class CrawlFrontier:
+    """Seen-set, priority queue and per-host limits backed by an append-only log."""
+
+    def __init__(
+        self,
+        log_path: Optional[str] = None,
+        max_depth: Optional[int] = None,
+        max_pages_per_host: Optional[int] = None,
+        capacity: int = 1_000_000,
+        error_rate: float = 0.001,
+    ):
+        self.log_path = log_path
+        self.max_depth = max_depth
+        self.max_pages_per_host = max_pages_per_host
+        self._capacity = capacity
+        self._error_rate = error_rate
+
+        self._lock = Lock()
+        self._reset()
+        self._log = None
+
+        if log_path:
+            self._replay(log_path)
+            self._log = open(log_path, "a", encoding="utf-8", buffering=1)
+
+    def _reset(self) -> None:
+        self._seen = BloomFilter(self._capacity, self._error_rate)
+        self._visited = BloomFilter(self._capacity, self._error_rate)
+        self._heap: List[FrontierEntry] = []
+        self._pending: Dict[str, FrontierEntry] = {}
+        self._host_pages: Dict[str, int] = {}
+        self._seq = 0
+        self.visited_count = 0
+        self.discovered_count = 0
+        self.last_visited: Optional[str] = None
+
+    # ------------------------------------------------------------------ #
+    # Persistence
+    # ------------------------------------------------------------------ #
+
+    def _replay(self, log_path: str) -> None:
+        if not os.path.exists(log_path):
+            return
+        with open(log_path, "r", encoding="utf-8") as fh:
+            for line in fh:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    # A torn final line from a crash; everything before it is valid.
+                    continue
+                op = record.get("op")
+                if op == "add":
+                    self._apply_add(
+                        record["url"],
+                        record.get("depth", 0),
+                        record.get("priority", OUTLINK_PRIORITY),
+                        record.get("source"),
+                    )
+                elif op == "visit":
+                    self._apply_visit(record["url"])
+
+    def _append(self, record: dict) -> None:
+        if self._log is None:
+            return
+        record["ts"] = round(time.time(), 3)
+        self._log.write(json.dumps(record, separators=(",", ":")) + "\n")
+
+    def close(self) -> None:
+        with self._lock:
+            if self._log is not None:
+                self._log.close()
+                self._log = None
+
+    def clear(self) -> None:
+        """Forget every visited and queued URL and truncate the log."""
+        with self._lock:
+            self._reset()
+            if self._log is not None:
+                self._log.close()
+                self._log = open(self.log_path, "w", encoding="utf-8", buffering=1)
+
+    # ------------------------------------------------------------------ #
+    # State transitions (caller holds the lock)
+    # ------------------------------------------------------------------ #
+
+    def _apply_add(
+        self, key: str, depth: int, priority: int, source: Optional[str]
+    ) -> bool:
+        if not self._seen.add(key):
+            return False
+        self.discovered_count += 1
+        if key in self._visited:
+            return False
+        self._seq += 1
+        entry = FrontierEntry(priority, self._seq, key, depth, source)
+        self._pending[key] = entry
+        heapq.heappush(self._heap, entry)
+        return True
+
+    def _apply_visit(self, key: str) -> bool:
+        self._seen.add(key)
+        self._pending.pop(key, None)
+        self.last_visited = key
+        if not self._visited.add(key):
+            return False
+        self.visited_count += 1
+        host = url_host(key)
+        self._host_pages[host] = self._host_pages.get(host, 0) + 1
+        return True
+
+    def _host_exhausted(self, host: str) -> bool:
+        if self.max_pages_per_host is None:
+            return False
+        return self._host_pages.get(host, 0) >= self.max_pages_per_host
+
+    # ------------------------------------------------------------------ #
+    # Public API
+    # ------------------------------------------------------------------ #
+
+    def add(
+        self,
+        url: str,
+        depth: int = 0,
+        priority: int = OUTLINK_PRIORITY,
+        source: Optional[str] = None,
+    ) -> bool:
+        """Queue a discovered URL. Returns False if it was seen, out of limits or malformed."""
+        key = _crawl_key(url)
+        if key is None:
+            return False
+        if self.max_depth is not None and depth > self.max_depth:
+            return False
+        with self._lock:
+            if self._host_exhausted(url_host(key)):
+                return False
+            if not self._apply_add(key, depth, priority, source):
+                return False
+            self._append(
+                {"op": "add", "url": key, "depth": depth, "priority": priority, "source": source}
+            )
+            return True
+
+    def mark_visited(self, url: str) -> bool:
+        """Record that ``url`` was rendered. Returns True only for a new unique page."""
+        key = _crawl_key(url)
+        if key is None:
+            return False
+        with self._lock:
+            is_new = self._apply_visit(key)
+            # Revisits change nothing but last_visited; logging them grows the log without bound
+            if is_new:
+                self._append({"op": "visit", "url": key})
+            return is_new
+
+    def is_visited(self, url: str) -> bool:
+        key = _crawl_key(url)
+        if key is None:
+            return False
+        with self._lock:
+            return key in self._visited
+
+    def allows(self, url: str, depth: int = 0) -> bool:
+        """Whether following ``url`` at ``depth`` stays within the configured limits."""
+        key = _crawl_key(url)
+        if key is None:
+            return False
+        if self.max_depth is not None and depth > self.max_depth:
+            return False
+        with self._lock:
+            return not self._host_exhausted(url_host(key))
+
+    def pop(self) -> Optional[FrontierEntry]:
+        """Return the highest-priority pending URL that is still within limits."""
+        with self._lock:
+            while self._heap:
+                entry = heapq.heappop(self._heap)
+                if self._pending.get(entry.url) is not entry:
+                    continue
+                del self._pending[entry.url]
+                if self._host_exhausted(url_host(entry.url)):
+                    continue
+                return entry
+            return None
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._pending)
+
+    def stats(self) -> dict:
+        with self._lock:
+            hosts: List[Tuple[str, int]] = sorted(
+                self._host_pages.items(), key=lambda item: item[1], reverse=True
+            )
+            return {
+                "visited": self.visited_count,
+                "discovered": self.discovered_count,
+                "pending": len(self._pending),
+                "last_visited": self.last_visited,
+                "seen_set_bytes": self._seen.size_bytes + self._visited.size_bytes,
+                "max_depth": self.max_depth,
+                "max_pages_per_host": self.max_pages_per_host,
+                "top_hosts": dict(hosts[:10]),
+                "log_path": self.log_path,
+            }
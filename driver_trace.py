@@ -0,0 +1,216 @@
+#!/usr/bin/env python3
+"""
+WebDriver command tracing for HumanBehavior.
+
+:class:`DriverTracer` attaches to a driver by shadowing its ``execute``
+method, which every driver and element command (``executeScript``,
+``findElement``, ``getElementRect``, ``elementClick``, ``actions``...)
+passes through. Each command is recorded with its duration, payload size and
+the HumanBehavior method that issued it. Methods decorated with
+:func:`traced` are recorded as enclosing spans, so the Chrome trace-event
+export nests commands under the behavior that caused them.
+
+Nothing is patched until a tracer is attached; with no tracer the decorator
+costs one attribute check per call. Commands issued outside any traced
+method (the stream's screenshot or CDP capture loop sharing the driver) are
+only counted, not recorded, unless ``record_unattributed=True``; otherwise
+they would fill the event buffer within minutes.
+
+Usage:
+    tracer = DriverTracer()
+    human = HumanBehavior(driver, tracer=tracer)
+    human.navigate_and_scroll("https://example.com")
+    json.dump(tracer.chrome_trace(), open("trace.json", "w"))
+"""
+
+from __future__ import annotations
+
+import functools
+import json
+import os
+import threading
+import time
+from collections import deque
+from typing import Deque, Dict, List, Tuple
+
+
+UNATTRIBUTED = "<unattributed>"
+
+
+def _payload_size(value) -> int:
+    if value is None:
+        return 0
+    if isinstance(value, (str, bytes)):
+        return len(value)
+    try:
+        return len(json.dumps(value, default=str))
+    except (TypeError, ValueError):
+        return 0
+
+
+class DriverTracer:
+    """Records WebDriver commands and HumanBehavior spans for one driver."""
+
+    def __init__(self, max_events: int = 100_000, record_unattributed: bool = False):
+        self.record_unattributed = record_unattributed
+        self.unattributed_skipped = 0
+        self._events: Deque[dict] = deque(maxlen=max_events)
+        self._aggregates: Dict[Tuple[str, str], List[float]] = {}
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._driver = None
+        self._epoch_ns = time.perf_counter_ns()
+        self._pid = os.getpid()
+
+    # ------------------------------------------------------------------ #
+    # Attachment
+    # ------------------------------------------------------------------ #
+
+    def attach(self, driver) -> None:
+        """Start tracing ``driver``'s commands."""
+        if self._driver is driver:
+            return
+        self.detach()
+        original = type(driver).execute.__get__(driver)
+
+        @functools.wraps(original)
+        def execute(driver_command, params=None):
+            if not self.record_unattributed and not self._stack():
+                with self._lock:
+                    self.unattributed_skipped += 1
+                return original(driver_command, params)
+            started = time.perf_counter_ns()
+            response = None
+            try:
+                response = original(driver_command, params)
+                return response
+            finally:
+                ended = time.perf_counter_ns()
+                value = response.get("value") if isinstance(response, dict) else None
+                self._record_command(
+                    driver_command,
+                    started,
+                    ended,
+                    _payload_size(params) + _payload_size(value),
+                )
+
+        driver.execute = execute
+        self._driver = driver
+
+    def detach(self) -> None:
+        """Stop tracing and restore the driver's own ``execute``."""
+        if self._driver is not None:
+            self._driver.__dict__.pop("execute", None)
+            self._driver = None
+
+    @property
+    def attached(self) -> bool:
+        return self._driver is not None
+
+    # ------------------------------------------------------------------ #
+    # Recording
+    # ------------------------------------------------------------------ #
+
+    def _stack(self) -> List[str]:
+        stack = getattr(self._local, "stack", None)
+        if stack is None:
+            stack = self._local.stack = []
+        return stack
+
+    def _record_command(self, command: str, started: int, ended: int, size: int) -> None:
+        stack = self._stack()
+        method = stack[-1] if stack else UNATTRIBUTED
+        duration_ms = (ended - started) / 1e6
+        event = {
+            "name": command,
+            "cat": "webdriver",
+            "ph": "X",
+            "ts": (started - self._epoch_ns) / 1000,
+            "dur": (ended - started) / 1000,
+            "pid": self._pid,
+            "tid": threading.get_ident(),
+            "args": {"method": method, "bytes": size},
+        }
+        with self._lock:
+            self._events.append(event)
+            agg = self._aggregates.setdefault((method, command), [0, 0.0, 0.0, 0])
+            agg[0] += 1
+            agg[1] += duration_ms
+            agg[2] = max(agg[2], duration_ms)
+            agg[3] += size
+
+    def _record_span(self, method: str, started: int, ended: int) -> None:
+        event = {
+            "name": method,
+            "cat": "human_behavior",
+            "ph": "X",
+            "ts": (started - self._epoch_ns) / 1000,
+            "dur": (ended - started) / 1000,
+            "pid": self._pid,
+            "tid": threading.get_ident(),
+        }
+        with self._lock:
+            self._events.append(event)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._events.clear()
+            self._aggregates.clear()
+            self.unattributed_skipped = 0
+
+    # ------------------------------------------------------------------ #
+    # Export
+    # ------------------------------------------------------------------ #
+
+    def chrome_trace(self) -> dict:
+        """Trace-event JSON loadable in chrome://tracing or Perfetto."""
+        with self._lock:
+            events = list(self._events)
+        return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+    def summary(self) -> dict:
+        """Per-method aggregates, commands sorted by total time."""
+        with self._lock:
+            items = list(self._aggregates.items())
+        methods: Dict[str, dict] = {}
+        for (method, command), (count, total_ms, max_ms, size) in items:
+            entry = methods.setdefault(
+                method, {"commands": 0, "total_ms": 0.0, "bytes": 0, "by_command": {}}
+            )
+            entry["commands"] += count
+            entry["total_ms"] += total_ms
+            entry["bytes"] += size
+            entry["by_command"][command] = {
+                "count": count,
+                "total_ms": round(total_ms, 3),
+                "avg_ms": round(total_ms / count, 3),
+                "max_ms": round(max_ms, 3),
+                "bytes": size,
+            }
+        for entry in methods.values():
+            entry["total_ms"] = round(entry["total_ms"], 3)
+            entry["by_command"] = dict(
+                sorted(entry["by_command"].items(), key=lambda kv: kv[1]["total_ms"], reverse=True)
+            )
+        return dict(sorted(methods.items(), key=lambda kv: kv[1]["total_ms"], reverse=True))
+
+
+def traced(func):
+    """Record a HumanBehavior method as a span when its ``tracer`` is set."""
+    name = func.__name__
+
+    @functools.wraps(func)
+    def wrapper(self, *args, **kwargs):
+        tracer = self.tracer
+        if tracer is None:
+            return func(self, *args, **kwargs)
+        stack = tracer._stack()
+        stack.append(name)
+        started = time.perf_counter_ns()
+        try:
+            return func(self, *args, **kwargs)
+        finally:
+            stack.pop()
+            tracer._record_span(name, started, time.perf_counter_ns())
+
+    return wrapper
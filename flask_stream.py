@@ -10,6 +10,7 @@ from __future__ import annotations
 
 import atexit
 import io
+import itertools
 import os
 import time
 from threading import Lock
@@ -17,7 +18,11 @@ from typing import Iterator
 
 from flask import Flask, Response, jsonify
 from PIL import Image
+from selenium.common.exceptions import WebDriverException
 
+import metrics
+from metrics import counter, gauge, histogram, locked, timed
+from cdp_capture import CaptureStats, create_cdp_capture
 from selenium_worker import create_driver
 
 
@@ -27,6 +32,24 @@ PROXY_URL = os.environ.get("PROXY_URL")
 JPEG_QUALITY = int(os.environ.get("JPEG_QUALITY", "85"))
 MAX_WIDTH = int(os.environ.get("CAPTURE_MAX_WIDTH", "1920"))
 MAX_HEIGHT = int(os.environ.get("CAPTURE_MAX_HEIGHT", "1080"))
+CAPTURE_MODE = os.environ.get("CAPTURE_MODE", "screenshot")  # "screenshot" or "cdp"
+CAPTURE_REGION = os.environ.get("CAPTURE_REGION", "viewport")  # "viewport" or "element" (cdp only)
+CAPTURE_REGION_SELECTOR = os.environ.get("CAPTURE_REGION_SELECTOR")
+CAPTURE_COMPARE_EVERY = int(os.environ.get("CAPTURE_COMPARE_EVERY", "100"))  # 0 = never sample the screenshot path
+
+
+STREAM_STAGE_SECONDS = histogram(
+    "stream_stage_seconds", "Frame pipeline time per stage", ["stage"], stage="stream"
+)
+STREAM_DRIVER_LOCK_WAIT = histogram(
+    "stream_driver_lock_wait_seconds", "Time spent waiting for _driver_lock", ["caller"], stage="driver_lock_wait"
+)
+STREAM_FRAMES_TOTAL = counter("stream_frames_sent_total", "MJPEG frames sent to viewers")
+STREAM_BYTES_TOTAL = counter("stream_bytes_sent_total", "MJPEG bytes sent to viewers")
+STREAM_VIEWERS = gauge("stream_active_viewers", "Currently connected /video_feed viewers")
+STREAM_FRAMES_PER_VIEWER = histogram(
+    "stream_frames_per_viewer", "Frames sent per viewer connection", buckets=(10, 100, 1000, 10000, 100000)
+)
 
 
 app = Flask(__name__)
@@ -34,6 +57,20 @@ _driver_lock = Lock()
 _driver_context = create_driver(PROXY_URL)
 _driver = _driver_context.__enter__()
 _driver.get(START_URL)
+_cdp_capture = (
+    create_cdp_capture(
+        _driver,
+        max_width=MAX_WIDTH,
+        max_height=MAX_HEIGHT,
+        quality=JPEG_QUALITY,
+        region=CAPTURE_REGION,
+        selector=CAPTURE_REGION_SELECTOR,
+    )
+    if CAPTURE_MODE == "cdp"
+    else None
+)
+_capture_stats = CaptureStats()
+_frame_counter = itertools.count(1)
 
 
 @atexit.register
@@ -45,28 +82,73 @@ def _shutdown_driver():
         _driver = None
 
 
-def _capture_frame() -> bytes:
-    with _driver_lock:
-        png_bytes = _driver.get_screenshot_as_png()
+def _screenshot_frame() -> bytes:
+    """Full-window PNG screenshot, decoded and re-encoded as JPEG with PIL."""
+    with locked(_driver_lock, STREAM_DRIVER_LOCK_WAIT, caller="capture"):
+        with timed(STREAM_STAGE_SECONDS, stage="screenshot"):
+            png_bytes = _driver.get_screenshot_as_png()
 
-    image = Image.open(io.BytesIO(png_bytes))
+    with timed(STREAM_STAGE_SECONDS, stage="decode"):
+        image = Image.open(io.BytesIO(png_bytes))
+        image.load()
     if image.width > MAX_WIDTH or image.height > MAX_HEIGHT:
-        image.thumbnail((MAX_WIDTH, MAX_HEIGHT))
+        with timed(STREAM_STAGE_SECONDS, stage="resize"):
+            image.thumbnail((MAX_WIDTH, MAX_HEIGHT))
 
     buffer = io.BytesIO()
-    image.save(buffer, format="JPEG", quality=JPEG_QUALITY, optimize=True)
+    with timed(STREAM_STAGE_SECONDS, stage="encode"):
+        image.save(buffer, format="JPEG", quality=JPEG_QUALITY, optimize=True)
     return buffer.getvalue()
 
 
+def _cdp_frame() -> bytes:
+    """JPEG rendered by Chrome at the output size (CAPTURE_MODE=cdp)."""
+    with locked(_driver_lock, STREAM_DRIVER_LOCK_WAIT, caller="capture"):
+        with timed(STREAM_STAGE_SECONDS, stage="cdp_capture"):
+            return _cdp_capture.capture()
+
+
+def _capture_frame() -> bytes:
+    # In CDP mode every CAPTURE_COMPARE_EVERY-th frame takes the screenshot
+    # path so /healthz can compare Python CPU, wall time and bytes per frame.
+    use_cdp = _cdp_capture is not None and not (
+        CAPTURE_COMPARE_EVERY and next(_frame_counter) % CAPTURE_COMPARE_EVERY == 0
+    )
+    cpu_started = time.thread_time()
+    wall_started = time.perf_counter()
+    path = "screenshot"
+    frame = None
+    if use_cdp:
+        try:
+            frame = _cdp_frame()
+            path = "cdp"
+        except WebDriverException as e:
+            print(f"CDP capture failed, falling back to screenshot: {e}")
+    if frame is None:
+        frame = _screenshot_frame()
+    _capture_stats.record(path, time.thread_time() - cpu_started, time.perf_counter() - wall_started, len(frame))
+    return frame
+
+
 def generate_frames() -> Iterator[bytes]:
     frame_interval = max(FRAME_RATE_SECONDS, 0.1)
-    while True:
-        frame = _capture_frame()
-        yield (
-            b"--frame\r\n"
-            b"Content-Type: image/jpeg\r\n\r\n" + frame + b"\r\n"
-        )
-        time.sleep(frame_interval)
+    frames_sent = 0
+    STREAM_VIEWERS.inc()
+    try:
+        while True:
+            frame = _capture_frame()
+            chunk = (
+                b"--frame\r\n"
+                b"Content-Type: image/jpeg\r\n\r\n" + frame + b"\r\n"
+            )
+            yield chunk
+            frames_sent += 1
+            STREAM_FRAMES_TOTAL.inc()
+            STREAM_BYTES_TOTAL.inc(len(chunk))
+            time.sleep(frame_interval)
+    finally:
+        STREAM_VIEWERS.dec()
+        STREAM_FRAMES_PER_VIEWER.observe(frames_sent)
 
 
 @app.route("/video_feed")
@@ -87,10 +169,19 @@ def healthz():
             "frame_rate_seconds": FRAME_RATE_SECONDS,
             "jpeg_quality": JPEG_QUALITY,
             "gpu_enabled": gpu_enabled,
+            "capture": {
+                "mode": "cdp" if _cdp_capture is not None else "screenshot",
+                "paths": _capture_stats.summary(),
+            },
         }
     )
 
 
+@app.route("/metrics")
+def metrics_endpoint():
+    return Response(metrics.render(), mimetype=metrics.CONTENT_TYPE)
+
+
 if __name__ == "__main__":
     host = os.environ.get("HOST", "0.0.0.0")
     port = int(os.environ.get("PORT", "8000"))
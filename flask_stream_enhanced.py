@@ -11,6 +11,8 @@ from __future__ import annotations
 
 import atexit
 import io
+import itertools
+import json
 import os
 import time
 import threading
@@ -19,9 +21,19 @@ from typing import Iterator, Optional
 
 from flask import Flask, Response, jsonify, request
 from PIL import Image
+from selenium.common.exceptions import WebDriverException
 
+import metrics
+from metrics import counter, gauge, histogram, locked, timed
+from cdp_capture import CaptureStats, create_cdp_capture
 from selenium_worker import create_driver
 from human_behavior import HumanBehavior
+from crawl_frontier import CrawlFrontier, PAGINATION_PRIORITY, normalize_url, url_host
+from frame_recorder import FrameRecorder
+from driver_trace import DriverTracer
+from selector_cache import SelectorCache
+from page_fingerprint import DuplicateIndex
+from video_encoder import FORMATS, EncoderUnavailable, VideoEncoder
 
 
 FRAME_RATE_SECONDS = float(os.environ.get("FRAME_RATE_SECONDS", "0.5"))
@@ -30,26 +42,117 @@ PROXY_URL = os.environ.get("PROXY_URL")
 JPEG_QUALITY = int(os.environ.get("JPEG_QUALITY", "85"))
 MAX_WIDTH = int(os.environ.get("CAPTURE_MAX_WIDTH", "1920"))
 MAX_HEIGHT = int(os.environ.get("CAPTURE_MAX_HEIGHT", "1080"))
+CAPTURE_MODE = os.environ.get("CAPTURE_MODE", "screenshot")  # "screenshot" or "cdp"
+CAPTURE_REGION = os.environ.get("CAPTURE_REGION", "viewport")  # "viewport" or "element" (cdp only)
+CAPTURE_REGION_SELECTOR = os.environ.get("CAPTURE_REGION_SELECTOR")
+CAPTURE_COMPARE_EVERY = int(os.environ.get("CAPTURE_COMPARE_EVERY", "100"))  # 0 = never sample the screenshot path
 AUTO_SCROLL = os.environ.get("AUTO_SCROLL", "1") == "1"
 AUTO_NEXT = os.environ.get("AUTO_NEXT", "1") == "1"
 SCROLL_INTERVAL = float(os.environ.get("SCROLL_INTERVAL", "10.0"))  # Time between auto-scrolls
+FRONTIER_LOG = os.environ.get("FRONTIER_LOG", "crawl_frontier.jsonl")  # Empty = in-memory only
+FRONTIER_RESUME = os.environ.get("FRONTIER_RESUME", "1") == "1"
+FRONTIER_FOLLOW_QUEUE = os.environ.get("FRONTIER_FOLLOW_QUEUE", "0") == "1"
+FRONTIER_MAX_DEPTH = int(os.environ["FRONTIER_MAX_DEPTH"]) if os.environ.get("FRONTIER_MAX_DEPTH") else None
+FRONTIER_MAX_PAGES_PER_HOST = (
+    int(os.environ["FRONTIER_MAX_PAGES_PER_HOST"]) if os.environ.get("FRONTIER_MAX_PAGES_PER_HOST") else None
+)
+RECORD_DIR = os.environ.get("RECORD_DIR", "")  # Empty = recording disabled
+RECORD_SEGMENT_MB = int(os.environ.get("RECORD_SEGMENT_MB", "64"))
+RECORD_BUDGET_MB = int(os.environ.get("RECORD_BUDGET_MB", "2048"))
+HUMAN_TRACE = os.environ.get("HUMAN_TRACE", "0") == "1"  # Trace WebDriver commands from the start
+SELECTOR_CACHE_PATH = os.environ.get("SELECTOR_CACHE_PATH", "selector_cache.json")  # Empty = in-memory only
+SELECTOR_CACHE_MAX_FAILURES = int(os.environ.get("SELECTOR_CACHE_MAX_FAILURES", "3"))
+VIDEO_STREAM = os.environ.get("VIDEO_STREAM", "1") == "1"  # Serve /video_stream (needs ffmpeg)
+VIDEO_KEYINT_SECONDS = float(os.environ.get("VIDEO_KEYINT_SECONDS", "2.0"))
+VIDEO_BITRATE_KBPS = int(os.environ.get("VIDEO_BITRATE_KBPS", "800"))
+VIDEO_LOW_LATENCY = os.environ.get("VIDEO_LOW_LATENCY", "1") == "1"
+VIDEO_IDLE_TIMEOUT = float(os.environ.get("VIDEO_IDLE_TIMEOUT", "10.0"))
+FFMPEG_BINARY = os.environ.get("FFMPEG_BINARY", "ffmpeg")
+DEDUP_ENABLED = os.environ.get("DEDUP_ENABLED", "1") == "1"
+DEDUP_MAX_DISTANCE = int(os.environ.get("DEDUP_MAX_DISTANCE", "10"))  # SimHash bits
+DEDUP_STOP_AFTER = int(os.environ.get("DEDUP_STOP_AFTER", "2"))  # Duplicate pages in a row before auto-next stops, 0 = never
+
+
+STREAM_STAGE_SECONDS = histogram(
+    "stream_stage_seconds", "Frame pipeline time per stage", ["stage"], stage="stream"
+)
+STREAM_DRIVER_LOCK_WAIT = histogram(
+    "stream_driver_lock_wait_seconds", "Time spent waiting for _driver_lock", ["caller"], stage="driver_lock_wait"
+)
+STREAM_FRAMES_TOTAL = counter("stream_frames_sent_total", "MJPEG frames sent to viewers")
+STREAM_BYTES_TOTAL = counter("stream_bytes_sent_total", "MJPEG bytes sent to viewers")
+STREAM_VIEWERS = gauge("stream_active_viewers", "Currently connected /video_feed viewers")
+STREAM_FRAMES_PER_VIEWER = histogram(
+    "stream_frames_per_viewer", "Frames sent per viewer connection", buckets=(10, 100, 1000, 10000, 100000)
+)
+VIDEO_ENCODER_LAG = gauge("video_encoder_lag_seconds", "Frames sent to ffmpeg but not yet encoded, in seconds", ["format"])
+VIDEO_VIEWERS = gauge("video_stream_viewers", "Currently connected /video_stream viewers", ["format"])
 
 
 app = Flask(__name__)
 _driver_lock = Lock()
 _driver_context = create_driver(PROXY_URL)
 _driver = _driver_context.__enter__()
-_human = HumanBehavior(_driver)
-_driver.get(START_URL)
+_frontier = CrawlFrontier(
+    FRONTIER_LOG or None,
+    max_depth=FRONTIER_MAX_DEPTH,
+    max_pages_per_host=FRONTIER_MAX_PAGES_PER_HOST,
+)
+_tracer = DriverTracer()
+_selector_cache = SelectorCache(SELECTOR_CACHE_PATH or None, max_failures=SELECTOR_CACHE_MAX_FAILURES)
+_duplicates = DuplicateIndex(max_distance=DEDUP_MAX_DISTANCE) if DEDUP_ENABLED else None
+_human = HumanBehavior(
+    _driver,
+    frontier=_frontier,
+    tracer=_tracer if HUMAN_TRACE else None,
+    selector_cache=_selector_cache,
+    duplicates=_duplicates,
+)
+_recorder = (
+    FrameRecorder(
+        RECORD_DIR,
+        segment_max_bytes=RECORD_SEGMENT_MB * 1024 * 1024,
+        disk_budget_bytes=RECORD_BUDGET_MB * 1024 * 1024,
+    )
+    if RECORD_DIR
+    else None
+)
+# Resume only the crawl START_URL belongs to; a changed START_URL starts fresh
+_resume = (
+    FRONTIER_RESUME
+    and _frontier.last_visited
+    and url_host(_frontier.last_visited) == url_host(normalize_url(START_URL))
+)
+_initial_url = _frontier.last_visited if _resume else START_URL
+_driver.get(_initial_url)
+_frontier.mark_visited(_driver.current_url)
+_human.check_duplicate()
+_cdp_capture = (
+    create_cdp_capture(
+        _driver,
+        max_width=MAX_WIDTH,
+        max_height=MAX_HEIGHT,
+        quality=JPEG_QUALITY,
+        region=CAPTURE_REGION,
+        selector=CAPTURE_REGION_SELECTOR,
+    )
+    if CAPTURE_MODE == "cdp"
+    else None
+)
+_capture_stats = CaptureStats()
+_frame_counter = itertools.count(1)
 
 # State management
 _state = {
-    "current_url": START_URL,
+    "current_url": _initial_url,
     "auto_scroll_enabled": AUTO_SCROLL,
     "auto_next_enabled": AUTO_NEXT,
     "is_scrolling": False,
     "last_action": "initialized",
-    "page_count": 1,
+    "page_count": max(1, _frontier.visited_count),
+    "crawl_depth": 0,
+    "duplicate_streak": 0,
+    "last_duplicate": None,
 }
 _state_lock = Lock()
 _stop_event = Event()
@@ -60,11 +163,93 @@ def _shutdown_driver():
     global _driver
     try:
         _stop_event.set()
+        _frontier.close()
+        _selector_cache.flush()
+        for encoder in _video_encoders.values():
+            encoder.stop()
+        if _recorder is not None:
+            _recorder.close()
         _driver_context.__exit__(None, None, None)
     finally:
         _driver = None
 
 
+def _record_visit(url: str, depth: Optional[int] = None) -> bool:
+    """Update shared state after a page load. Caller must hold ``_state_lock``."""
+    is_new = _frontier.mark_visited(url)
+    _state["current_url"] = url
+    _state["page_count"] = _frontier.visited_count
+    if depth is not None:
+        _state["crawl_depth"] = depth
+    return is_new
+
+
+def _follow_next_page() -> Optional[str]:
+    """
+    Click the next-page button unless it leads somewhere already visited.
+    Falls back to the frontier queue when enabled. Caller holds both locks.
+    
+    Returns:
+        The new URL, or None if nothing was followed.
+    """
+    depth = _state["crawl_depth"] + 1
+    next_button = _human.find_next_page_button()
+    next_href = _human.get_href(next_button) if next_button else None
+    
+    if next_button and next_href and (
+        _frontier.is_visited(next_href) or not _frontier.allows(next_href, depth)
+    ):
+        # Circular pagination or over the host/depth limit
+        _state["last_action"] = "next_page_already_visited"
+        next_button = None
+    elif next_button and not next_href and not _frontier.allows(_driver.current_url, depth):
+        # Script-driven control: the target is unknown, so check the host it runs on
+        _state["last_action"] = "next_page_already_visited"
+        next_button = None
+    
+    if next_button:
+        if next_href:
+            _frontier.add(next_href, depth=depth, priority=PAGINATION_PRIORITY, source=_driver.current_url)
+        _state["last_action"] = "clicking_next_page"
+        _human.human_click(next_button)
+        time.sleep(2)  # Wait for page load
+    elif FRONTIER_FOLLOW_QUEUE:
+        entry = _frontier.pop()
+        if entry is None:
+            return None
+        depth = entry.depth
+        _state["last_action"] = "following_frontier"
+        _driver.get(entry.url)
+        time.sleep(2)  # Wait for page load
+    else:
+        return None
+    
+    new_url = _driver.current_url
+    if _record_visit(new_url, depth):
+        _state["last_action"] = f"loaded_page_{_state['page_count']}"
+    elif next_button and not next_href:
+        # A script-driven control led back to a visited page; clicking again would loop
+        _state["auto_next_enabled"] = False
+        _state["last_action"] = "next_page_already_visited"
+        return None
+    else:
+        _state["last_action"] = "revisited_page"
+    
+    match = _human.check_duplicate()
+    if match is not None:
+        _state["last_duplicate"] = match if match["duplicate"] else None
+        if match["duplicate"]:
+            _state["duplicate_streak"] += 1
+            _state["last_action"] = f"duplicate_page_{match['kind']}"
+            if DEDUP_STOP_AFTER and _state["duplicate_streak"] >= DEDUP_STOP_AFTER:
+                # Pagination keeps serving the same content; stop until re-enabled via /config
+                _state["auto_next_enabled"] = False
+                _state["last_action"] = "auto_next_stopped_duplicates"
+        else:
+            _state["duplicate_streak"] = 0
+    return new_url
+
+
 def _auto_scroll_worker():
     """Background worker that periodically scrolls the page."""
     while not _stop_event.is_set():
@@ -77,7 +262,7 @@ def _auto_scroll_worker():
                 _state["is_scrolling"] = True
                 _state["last_action"] = "auto_scrolling"
             
-            with _driver_lock:
+            with locked(_driver_lock, STREAM_DRIVER_LOCK_WAIT, caller="auto_scroll"):
                 # Scroll down slowly (3-5 scrolls)
                 _human.scroll_down_slowly(
                     scroll_pause_time=1.5,
@@ -88,14 +273,7 @@ def _auto_scroll_worker():
                 # Try to find and click next page if enabled
                 with _state_lock:
                     if _state["auto_next_enabled"]:
-                        next_button = _human.find_next_page_button()
-                        if next_button:
-                            _state["last_action"] = "clicking_next_page"
-                            _human.human_click(next_button)
-                            time.sleep(2)  # Wait for page load
-                            _state["current_url"] = _driver.current_url
-                            _state["page_count"] += 1
-                            _state["last_action"] = f"loaded_page_{_state['page_count']}"
+                        _follow_next_page()
             
             with _state_lock:
                 _state["is_scrolling"] = False
@@ -115,28 +293,165 @@ if AUTO_SCROLL:
     _scroll_thread.start()
 
 
-def _capture_frame() -> bytes:
-    with _driver_lock:
-        png_bytes = _driver.get_screenshot_as_png()
+def _screenshot_frame() -> bytes:
+    """Full-window PNG screenshot, decoded and re-encoded as JPEG with PIL."""
+    with locked(_driver_lock, STREAM_DRIVER_LOCK_WAIT, caller="capture"):
+        with timed(STREAM_STAGE_SECONDS, stage="screenshot"):
+            png_bytes = _driver.get_screenshot_as_png()
 
-    image = Image.open(io.BytesIO(png_bytes))
+    with timed(STREAM_STAGE_SECONDS, stage="decode"):
+        image = Image.open(io.BytesIO(png_bytes))
+        image.load()
     if image.width > MAX_WIDTH or image.height > MAX_HEIGHT:
-        image.thumbnail((MAX_WIDTH, MAX_HEIGHT))
+        with timed(STREAM_STAGE_SECONDS, stage="resize"):
+            image.thumbnail((MAX_WIDTH, MAX_HEIGHT))
 
     buffer = io.BytesIO()
-    image.save(buffer, format="JPEG", quality=JPEG_QUALITY, optimize=True)
+    with timed(STREAM_STAGE_SECONDS, stage="encode"):
+        image.save(buffer, format="JPEG", quality=JPEG_QUALITY, optimize=True)
     return buffer.getvalue()
 
 
+def _cdp_frame() -> bytes:
+    """JPEG rendered by Chrome at the output size (CAPTURE_MODE=cdp)."""
+    with locked(_driver_lock, STREAM_DRIVER_LOCK_WAIT, caller="capture"):
+        with timed(STREAM_STAGE_SECONDS, stage="cdp_capture"):
+            return _cdp_capture.capture()
+
+
+def _capture_frame() -> bytes:
+    # In CDP mode every CAPTURE_COMPARE_EVERY-th frame takes the screenshot
+    # path so /healthz can compare Python CPU, wall time and bytes per frame.
+    use_cdp = _cdp_capture is not None and not (
+        CAPTURE_COMPARE_EVERY and next(_frame_counter) % CAPTURE_COMPARE_EVERY == 0
+    )
+    cpu_started = time.thread_time()
+    wall_started = time.perf_counter()
+    path = "screenshot"
+    frame = None
+    if use_cdp:
+        try:
+            frame = _cdp_frame()
+            path = "cdp"
+        except WebDriverException as e:
+            print(f"CDP capture failed, falling back to screenshot: {e}")
+    if frame is None:
+        frame = _screenshot_frame()
+    _capture_stats.record(path, time.thread_time() - cpu_started, time.perf_counter() - wall_started, len(frame))
+
+    if _recorder is not None:
+        now = time.time()
+        _recorder.observe_state(
+            {"current_url": _state["current_url"], "last_action": _state["last_action"]},
+            ts=now,
+        )
+        _recorder.record_frame(frame, ts=now)
+    return frame
+
+
+# With RECORD_DIR set, one thread captures (and records) every frame whether or
+# not anyone is watching; viewers reuse its latest frame.
+_latest_frame: Optional[bytes] = None
+_latest_frame_cond = threading.Condition()
+
+
+def _recording_worker():
+    """Capture and record a frame every FRAME_RATE_SECONDS."""
+    global _latest_frame
+    interval = max(FRAME_RATE_SECONDS, 0.1)
+    while not _stop_event.is_set():
+        started = time.monotonic()
+        try:
+            frame = _capture_frame()
+            with _latest_frame_cond:
+                _latest_frame = frame
+                _latest_frame_cond.notify_all()
+        except Exception as e:
+            print(f"Recording worker error: {e}")
+        _stop_event.wait(max(0.0, interval - (time.monotonic() - started)))
+
+
+def _current_frame() -> bytes:
+    """Frame for a viewer: the recording thread's latest, or a fresh capture when not recording."""
+    if _recorder is None:
+        return _capture_frame()
+    with _latest_frame_cond:
+        if _latest_frame is None:
+            _latest_frame_cond.wait_for(lambda: _latest_frame is not None, timeout=10.0)
+        if _latest_frame is not None:
+            return _latest_frame
+    return _capture_frame()
+
+
+if _recorder is not None:
+    _recording_thread = threading.Thread(target=_recording_worker, daemon=True)
+    _recording_thread.start()
+
+
+def _multipart_frame(frame: bytes, extra_headers: bytes = b"") -> bytes:
+    return (
+        b"--frame\r\n"
+        b"Content-Type: image/jpeg\r\n" + extra_headers + b"\r\n" + frame + b"\r\n"
+    )
+
+
 def generate_frames() -> Iterator[bytes]:
     frame_interval = max(FRAME_RATE_SECONDS, 0.1)
-    while True:
-        frame = _capture_frame()
-        yield (
-            b"--frame\r\n"
-            b"Content-Type: image/jpeg\r\n\r\n" + frame + b"\r\n"
+    frames_sent = 0
+    STREAM_VIEWERS.inc()
+    try:
+        while True:
+            chunk = _multipart_frame(_current_frame())
+            yield chunk
+            frames_sent += 1
+            STREAM_FRAMES_TOTAL.inc()
+            STREAM_BYTES_TOTAL.inc(len(chunk))
+            time.sleep(frame_interval)
+    finally:
+        STREAM_VIEWERS.dec()
+        STREAM_FRAMES_PER_VIEWER.observe(frames_sent)
+
+
+# One encoder per format, shared by every /video_stream viewer
+_video_encoders = (
+    {
+        fmt: VideoEncoder(
+            _current_frame,
+            fmt=fmt,
+            fps=1.0 / max(FRAME_RATE_SECONDS, 0.1),
+            keyint_seconds=VIDEO_KEYINT_SECONDS,
+            bitrate_kbps=VIDEO_BITRATE_KBPS,
+            low_latency=VIDEO_LOW_LATENCY,
+            ffmpeg=FFMPEG_BINARY,
+            idle_timeout=VIDEO_IDLE_TIMEOUT,
         )
-        time.sleep(frame_interval)
+        for fmt in FORMATS
+    }
+    if VIDEO_STREAM
+    else {}
+)
+
+
+def _video_stats() -> dict:
+    stats = {}
+    for fmt, encoder in _video_encoders.items():
+        stats[fmt] = encoder.stats()
+        VIDEO_ENCODER_LAG.set(stats[fmt]["lag_seconds"], format=fmt)
+        VIDEO_VIEWERS.set(stats[fmt]["viewers"], format=fmt)
+    return stats
+
+
+def generate_replay(start: Optional[float], end: Optional[float], speed: float) -> Iterator[bytes]:
+    """Stream recorded frames, pacing them by their original spacing / ``speed``."""
+    previous_ts = None
+    for ts, frame, events in _recorder.iter_frames(start, end):
+        if previous_ts is not None and speed > 0:
+            time.sleep(min(max(ts - previous_ts, 0.0) / speed, 10.0))
+        previous_ts = ts
+        headers = b"X-Frame-Timestamp: %.3f\r\n" % ts
+        if events:
+            headers += b"X-State-Events: " + json.dumps(events).encode("utf-8") + b"\r\n"
+        yield _multipart_frame(frame, headers)
 
 
 @app.route("/video_feed")
@@ -147,6 +462,53 @@ def video_feed():
     )
 
 
+@app.route("/video_stream")
+def video_stream():
+    """H.264 fMP4 (default) or VP8 WebM: /video_stream?format=webm. /video_feed stays MJPEG."""
+    fmt = request.args.get("format", "mp4")
+    encoder = _video_encoders.get(fmt)
+    if encoder is None:
+        if not _video_encoders:
+            return jsonify({"error": "Video stream disabled (set VIDEO_STREAM=1)"}), 404
+        return jsonify({"error": f"format must be one of {', '.join(_video_encoders)}"}), 400
+    chunks = encoder.stream()
+    try:
+        first = next(chunks)
+    except (EncoderUnavailable, StopIteration) as e:
+        chunks.close()
+        return jsonify({"error": f"Video encoder unavailable: {e}", "fallback": "/video_feed"}), 503
+
+    def generate() -> Iterator[bytes]:
+        yield first
+        yield from chunks
+
+    return Response(generate(), mimetype=encoder.mimetype, headers={"Cache-Control": "no-store"})
+
+
+@app.route("/replay")
+def replay():
+    """Replay recorded frames: /replay?from=<epoch>&to=<epoch>&speed=<factor>."""
+    if _recorder is None:
+        return jsonify({"error": "Recording disabled (set RECORD_DIR)"}), 404
+    start = request.args.get("from", type=float)
+    end = request.args.get("to", type=float)
+    speed = request.args.get("speed", 1.0, type=float)
+    return Response(
+        generate_replay(start, end, speed),
+        mimetype="multipart/x-mixed-replace; boundary=frame",
+    )
+
+
+@app.route("/recordings")
+def recordings():
+    """Recorder stats and the state-event timeline for an optional time range."""
+    if _recorder is None:
+        return jsonify({"error": "Recording disabled (set RECORD_DIR)"}), 404
+    start = request.args.get("from", type=float)
+    end = request.args.get("to", type=float)
+    return jsonify({"stats": _recorder.stats(), "events": _recorder.events(start, end)})
+
+
 @app.route("/healthz")
 def healthz():
     with _state_lock:
@@ -166,10 +528,90 @@ def healthz():
             "last_action": state_copy["last_action"],
             "page_count": state_copy["page_count"],
             "is_scrolling": state_copy["is_scrolling"],
+            "frontier": _frontier.stats(),
+            "human_profile": _human.profile.name,
+            "human_timing": _human.timing_stats(),
+            "capture": {
+                "mode": "cdp" if _cdp_capture is not None else "screenshot",
+                "paths": _capture_stats.summary(),
+            },
+            "video": _video_stats(),
+            "duplicates": _duplicates.stats() if _duplicates is not None else None,
         }
     )
 
 
+@app.route("/metrics")
+def metrics_endpoint():
+    _video_stats()
+    return Response(metrics.render(), mimetype=metrics.CONTENT_TYPE)
+
+
+@app.route("/trace", methods=["GET", "POST", "DELETE"])
+def trace():
+    """
+    GET: download the WebDriver trace as Chrome trace-event JSON.
+    POST {"enabled": bool}: turn tracing on or off.
+    DELETE: discard recorded events.
+    """
+    if request.method == "POST":
+        data = request.get_json() or {}
+        enabled = bool(data.get("enabled", True))
+        with _driver_lock:
+            _human.set_tracer(_tracer if enabled else None)
+        return jsonify({"success": True, "tracing": enabled})
+    
+    if request.method == "DELETE":
+        _tracer.clear()
+        return jsonify({"success": True})
+    
+    response = jsonify(_tracer.chrome_trace())
+    response.headers["Content-Disposition"] = "attachment; filename=webdriver_trace.json"
+    return response
+
+
+@app.route("/trace/summary")
+def trace_summary():
+    """Per-HumanBehavior-method WebDriver command counts, time and payload bytes."""
+    return jsonify({
+        "tracing": _tracer.attached,
+        "methods": _tracer.summary(),
+        # Stream capture and other commands outside HumanBehavior are counted, not traced
+        "unattributed_skipped": _tracer.unattributed_skipped,
+    })
+
+
+@app.route("/selector_cache", methods=["GET", "DELETE"])
+def selector_cache():
+    """Learned next-page locators per domain; DELETE ?domain=... to forget one (or all)."""
+    if request.method == "DELETE":
+        _selector_cache.forget(request.args.get("domain"))
+        return jsonify({"success": True})
+    return jsonify(_selector_cache.stats())
+
+
+@app.route("/duplicates", methods=["GET", "DELETE"])
+def duplicates():
+    """Per-domain duplicate rates; DELETE clears the fingerprint index."""
+    if _duplicates is None:
+        return jsonify({"error": "Duplicate detection disabled (set DEDUP_ENABLED=1)"}), 404
+    if request.method == "DELETE":
+        _duplicates.clear()
+        return jsonify({"success": True})
+    return jsonify(_duplicates.stats())
+
+
+@app.route("/frontier", methods=["GET", "DELETE"])
+def frontier():
+    """Crawl frontier statistics (unique pages, queue size, per-host counts); DELETE resets it."""
+    if request.method == "DELETE":
+        with _state_lock:
+            _frontier.clear()
+            _record_visit(_state["current_url"], 0)
+        return jsonify({"success": True})
+    return jsonify(_frontier.stats())
+
+
 @app.route("/navigate", methods=["POST"])
 def navigate():
     """Navigate to a new URL with human-like behavior."""
@@ -177,18 +619,32 @@ def navigate():
     url = data.get("url")
     scroll = data.get("scroll", True)
     find_next = data.get("find_next", True)
+    discover = data.get("discover", False)
+    skip_duplicates = data.get("skip_duplicates", False)
+    profile = data.get("profile")  # "human", "fast" or "virtual" for this call only
     
     if not url:
         return jsonify({"error": "URL is required"}), 400
     
     try:
-        with _driver_lock:
-            result = _human.navigate_and_scroll(url, scroll_count=None if scroll else 0, find_next=find_next)
+        with metrics.request_timings() as timings:
+            with locked(_driver_lock, STREAM_DRIVER_LOCK_WAIT, caller="navigate"):
+                result = _human.navigate_and_scroll(
+                    url,
+                    scroll_count=None if scroll else 0,
+                    find_next=find_next,
+                    discover=discover,
+                    skip_duplicates=skip_duplicates,
+                    profile=profile,
+                )
+                current_url = _driver.current_url
+        result["timings"] = timings.as_dict()
         
         with _state_lock:
-            _state["current_url"] = _driver.current_url
-            if result.get("next_page_clicked"):
-                _state["page_count"] += 1
+            # navigate_and_scroll already recorded the visits in the frontier
+            _state["current_url"] = current_url
+            _state["page_count"] = _frontier.visited_count
+            _state["crawl_depth"] = 1 if result.get("next_page_clicked") else 0
             _state["last_action"] = "manual_navigation"
         
         return jsonify(result)
@@ -207,7 +663,7 @@ def scroll():
             _state["is_scrolling"] = True
             _state["last_action"] = "manual_scrolling"
         
-        with _driver_lock:
+        with locked(_driver_lock, STREAM_DRIVER_LOCK_WAIT, caller="scroll"):
             _human.scroll_down_slowly(
                 scroll_pause_time=1.5,
                 num_scrolls=num_scrolls,
@@ -229,26 +685,22 @@ def scroll():
 def next_page():
     """Find and click the next page button."""
     try:
-        with _driver_lock:
-            next_button = _human.find_next_page_button()
-            
-            if not next_button:
-                return jsonify({"success": False, "error": "Next page button not found"})
-            
-            _human.human_click(next_button)
-            time.sleep(2)  # Wait for page load
-            
-            new_url = _driver.current_url
+        with locked(_driver_lock, STREAM_DRIVER_LOCK_WAIT, caller="next_page"), _state_lock:
+            new_url = _follow_next_page()
+            last_action = _state["last_action"]
+            page_count = _state["page_count"]
+            duplicate = _state["last_duplicate"]
         
-        with _state_lock:
-            _state["current_url"] = new_url
-            _state["page_count"] += 1
-            _state["last_action"] = f"loaded_page_{_state['page_count']}"
+        if not new_url:
+            error = "Next page already visited" if last_action == "next_page_already_visited" else "Next page button not found"
+            return jsonify({"success": False, "error": error})
         
         return jsonify({
             "success": True,
             "new_url": new_url,
-            "page_count": _state["page_count"],
+            "new_page": last_action != "revisited_page",
+            "page_count": page_count,
+            "duplicate": duplicate,
         })
     except Exception as e:
         return jsonify({"error": str(e)}), 500
@@ -263,6 +715,7 @@ def config():
                 "auto_scroll_enabled": _state["auto_scroll_enabled"],
                 "auto_next_enabled": _state["auto_next_enabled"],
                 "scroll_interval": SCROLL_INTERVAL,
+                "human_profile": _human.profile.name,
             })
     
     # POST - update config
@@ -273,8 +726,16 @@ def config():
             _state["auto_scroll_enabled"] = bool(data["auto_scroll_enabled"])
         if "auto_next_enabled" in data:
             _state["auto_next_enabled"] = bool(data["auto_next_enabled"])
+            _state["duplicate_streak"] = 0
+    
+    if "human_profile" in data:
+        try:
+            with _driver_lock:
+                _human.set_profile(data["human_profile"])
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
     
-    return jsonify({"success": True, "config": _state})
+    return jsonify({"success": True, "config": _state, "human_profile": _human.profile.name})
 
 
 if __name__ == "__main__":
@@ -0,0 +1,298 @@
+#!/usr/bin/env python3
+"""
+Record-to-disk for the MJPEG stream with indexed seek and replay.
+
+Frames handed to :meth:`FrameRecorder.record_frame` are queued and written by
+a background thread, so the live capture path only pays for a queue put.
+Consecutive identical frames are stored once. State changes (``last_action``,
+``current_url``) are stored as JSON event records in the same segments.
+
+Each segment ``rec-000001.seg`` has a sibling ``rec-000001.idx`` of fixed
+width (timestamp, offset, length, kind) entries; replay seeks through the
+index and reads payloads via mmap. When the total size exceeds the disk
+budget the oldest segments are deleted.
+
+Usage:
+    recorder = FrameRecorder("recordings", disk_budget_bytes=2 * 1024**3)
+    recorder.record_frame(jpeg_bytes)
+    for ts, jpeg, events in recorder.iter_frames(start, end):
+        ...
+"""
+
+from __future__ import annotations
+
+import bisect
+import hashlib
+import json
+import mmap
+import os
+import queue
+import struct
+import threading
+import time
+from dataclasses import dataclass
+from typing import Dict, Iterator, List, Optional, Tuple
+
+
+SEGMENT_PREFIX = "rec-"
+SEGMENT_SUFFIX = ".seg"
+INDEX_SUFFIX = ".idx"
+
+KIND_FRAME = 0
+KIND_EVENT = 1
+
+# timestamp, offset, payload length, kind
+_INDEX_ENTRY = struct.Struct("<dQIB")
+
+
+@dataclass(frozen=True)
+class RecordEntry:
+    ts: float
+    segment: int
+    offset: int
+    length: int
+    kind: int
+
+
+class FrameRecorder:
+    """Rolling on-disk recorder for JPEG frames and state events."""
+
+    def __init__(
+        self,
+        root: str,
+        segment_max_bytes: int = 64 * 1024 * 1024,
+        disk_budget_bytes: int = 2 * 1024 * 1024 * 1024,
+        queue_size: int = 256,
+    ):
+        self.root = root
+        self.segment_max_bytes = segment_max_bytes
+        self.disk_budget_bytes = max(disk_budget_bytes, segment_max_bytes)
+        os.makedirs(root, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._entries: List[RecordEntry] = []
+        self._timestamps: List[float] = []
+        self._segment_sizes: Dict[int, int] = {}
+        self._maps: Dict[int, Tuple[int, mmap.mmap]] = {}
+        self._last_digest: Optional[bytes] = None
+        self._last_state: Dict[str, object] = {}
+        self.frames_written = 0
+        self.frames_deduplicated = 0
+        self.frames_dropped = 0
+        self.segments_evicted = 0
+
+        self._load_existing()
+        self._segment = (max(self._segment_sizes) + 1) if self._segment_sizes else 1
+        self._data_fh = None
+        self._index_fh = None
+        self._open_segment()
+        self._evict()
+
+        self._queue: "queue.Queue[Optional[Tuple[int, float, bytes]]]" = queue.Queue(maxsize=queue_size)
+        self._writer = threading.Thread(target=self._write_loop, name="frame-recorder", daemon=True)
+        self._writer.start()
+
+    # ------------------------------------------------------------------ #
+    # Segment management
+    # ------------------------------------------------------------------ #
+
+    def _path(self, segment: int, suffix: str) -> str:
+        return os.path.join(self.root, f"{SEGMENT_PREFIX}{segment:06d}{suffix}")
+
+    def _load_existing(self) -> None:
+        for name in sorted(os.listdir(self.root)):
+            if not (name.startswith(SEGMENT_PREFIX) and name.endswith(INDEX_SUFFIX)):
+                continue
+            try:
+                segment = int(name[len(SEGMENT_PREFIX):-len(INDEX_SUFFIX)])
+            except ValueError:
+                continue
+            data_path = self._path(segment, SEGMENT_SUFFIX)
+            if not os.path.exists(data_path):
+                continue
+            data_size = os.path.getsize(data_path)
+            with open(self._path(segment, INDEX_SUFFIX), "rb") as fh:
+                data = fh.read()
+            usable = len(data) - len(data) % _INDEX_ENTRY.size
+            for ts, offset, length, kind in _INDEX_ENTRY.iter_unpack(data[:usable]):
+                if offset + length <= data_size:
+                    self._append_entry(RecordEntry(ts, segment, offset, length, kind))
+            self._segment_sizes[segment] = data_size
+
+    def _append_entry(self, entry: RecordEntry) -> None:
+        if self._timestamps and entry.ts < self._timestamps[-1]:
+            pos = bisect.bisect_right(self._timestamps, entry.ts)
+            self._timestamps.insert(pos, entry.ts)
+            self._entries.insert(pos, entry)
+        else:
+            self._timestamps.append(entry.ts)
+            self._entries.append(entry)
+
+    def _open_segment(self) -> None:
+        self._data_fh = open(self._path(self._segment, SEGMENT_SUFFIX), "ab")
+        self._index_fh = open(self._path(self._segment, INDEX_SUFFIX), "ab")
+        self._segment_sizes[self._segment] = self._data_fh.tell()
+
+    def _roll_segment(self) -> None:
+        self._data_fh.close()
+        self._index_fh.close()
+        self._segment += 1
+        self._open_segment()
+        self._evict()
+
+    def _evict(self) -> None:
+        """Delete the oldest closed segments until the disk budget is met."""
+        while sum(self._segment_sizes.values()) > self.disk_budget_bytes and len(self._segment_sizes) > 1:
+            oldest = min(self._segment_sizes)
+            with self._lock:
+                del self._segment_sizes[oldest]
+                keep = [i for i, e in enumerate(self._entries) if e.segment != oldest]
+                self._entries = [self._entries[i] for i in keep]
+                self._timestamps = [self._timestamps[i] for i in keep]
+                cached = self._maps.pop(oldest, None)
+            if cached:
+                cached[1].close()
+            for suffix in (SEGMENT_SUFFIX, INDEX_SUFFIX):
+                try:
+                    os.remove(self._path(oldest, suffix))
+                except FileNotFoundError:
+                    pass
+            self.segments_evicted += 1
+
+    # ------------------------------------------------------------------ #
+    # Writing
+    # ------------------------------------------------------------------ #
+
+    def _write_loop(self) -> None:
+        while True:
+            item = self._queue.get()
+            if item is None:
+                break
+            kind, ts, payload = item
+            try:
+                self._write(kind, ts, payload)
+            except OSError as exc:
+                print(f"Frame recorder write error: {exc}")
+
+    def _write(self, kind: int, ts: float, payload: bytes) -> None:
+        if self._segment_sizes[self._segment] + len(payload) > self.segment_max_bytes and self._segment_sizes[self._segment]:
+            self._roll_segment()
+
+        offset = self._segment_sizes[self._segment]
+        self._data_fh.write(payload)
+        self._data_fh.flush()
+        self._index_fh.write(_INDEX_ENTRY.pack(ts, offset, len(payload), kind))
+        self._index_fh.flush()
+
+        with self._lock:
+            self._segment_sizes[self._segment] = offset + len(payload)
+            self._append_entry(RecordEntry(ts, self._segment, offset, len(payload), kind))
+        if kind == KIND_FRAME:
+            self.frames_written += 1
+
+    def _enqueue(self, kind: int, ts: float, payload: bytes) -> None:
+        try:
+            self._queue.put_nowait((kind, ts, payload))
+        except queue.Full:
+            # Never block the live stream on disk I/O
+            self.frames_dropped += 1
+
+    def record_frame(self, jpeg: bytes, ts: Optional[float] = None) -> bool:
+        """Queue a frame unless it is identical to the previous one."""
+        digest = hashlib.blake2b(jpeg, digest_size=16).digest()
+        if digest == self._last_digest:
+            self.frames_deduplicated += 1
+            return False
+        self._last_digest = digest
+        self._enqueue(KIND_FRAME, ts if ts is not None else time.time(), jpeg)
+        return True
+
+    def record_event(self, name: str, value: object, ts: Optional[float] = None) -> None:
+        payload = json.dumps({"event": name, "value": value}).encode("utf-8")
+        self._enqueue(KIND_EVENT, ts if ts is not None else time.time(), payload)
+
+    def observe_state(self, state: Dict[str, object], ts: Optional[float] = None) -> None:
+        """Record an event for each key whose value changed since the last call."""
+        for key, value in state.items():
+            if self._last_state.get(key, object()) != value:
+                self._last_state[key] = value
+                self.record_event(key, value, ts)
+
+    def close(self) -> None:
+        self._queue.put(None)
+        self._writer.join(timeout=5)
+        self._data_fh.close()
+        self._index_fh.close()
+        with self._lock:
+            for _, mapped in self._maps.values():
+                mapped.close()
+            self._maps.clear()
+
+    # ------------------------------------------------------------------ #
+    # Reading
+    # ------------------------------------------------------------------ #
+
+    def _read(self, entry: RecordEntry) -> Optional[bytes]:
+        with self._lock:
+            cached = self._maps.get(entry.segment)
+            if not cached or cached[0] < entry.offset + entry.length:
+                if cached:
+                    cached[1].close()
+                try:
+                    with open(self._path(entry.segment, SEGMENT_SUFFIX), "rb") as fh:
+                        size = os.fstat(fh.fileno()).st_size
+                        mapped = mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ)
+                except (FileNotFoundError, ValueError):
+                    # Evicted while we were replaying it
+                    self._maps.pop(entry.segment, None)
+                    return None
+                cached = (size, mapped)
+                self._maps[entry.segment] = cached
+            return cached[1][entry.offset:entry.offset + entry.length]
+
+    def _select(self, start: Optional[float], end: Optional[float]) -> List[RecordEntry]:
+        with self._lock:
+            lo = 0 if start is None else bisect.bisect_left(self._timestamps, start)
+            hi = len(self._timestamps) if end is None else bisect.bisect_right(self._timestamps, end)
+            return self._entries[lo:hi]
+
+    def events(self, start: Optional[float] = None, end: Optional[float] = None) -> List[dict]:
+        result = []
+        for entry in self._select(start, end):
+            if entry.kind != KIND_EVENT:
+                continue
+            payload = self._read(entry)
+            if payload is not None:
+                result.append({"ts": entry.ts, **json.loads(payload)})
+        return result
+
+    def iter_frames(
+        self, start: Optional[float] = None, end: Optional[float] = None
+    ) -> Iterator[Tuple[float, bytes, List[dict]]]:
+        """Yield ``(ts, jpeg, events)`` where events are those since the previous frame."""
+        pending: List[dict] = []
+        for entry in self._select(start, end):
+            payload = self._read(entry)
+            if payload is None:
+                continue
+            if entry.kind == KIND_EVENT:
+                pending.append({"ts": entry.ts, **json.loads(payload)})
+                continue
+            yield entry.ts, payload, pending
+            pending = []
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "root": self.root,
+                "segments": len(self._segment_sizes),
+                "bytes": sum(self._segment_sizes.values()),
+                "disk_budget_bytes": self.disk_budget_bytes,
+                "oldest_ts": self._timestamps[0] if self._timestamps else None,
+                "newest_ts": self._timestamps[-1] if self._timestamps else None,
+                "frames_written": self.frames_written,
+                "frames_deduplicated": self.frames_deduplicated,
+                "frames_dropped": self.frames_dropped,
+                "segments_evicted": self.segments_evicted,
+                "queue_depth": self._queue.qsize(),
+            }
@@ -6,9 +6,10 @@ Includes realistic scrolling, mouse movements, clicking, and page navigation.
 
 from __future__ import annotations
 
-import random
+import functools
 import time
-from typing import List, Optional
+from contextlib import contextmanager
+from typing import Dict, List, Optional, Union
 
 from selenium import webdriver
 from selenium.webdriver.common.by import By
@@ -22,6 +23,41 @@ from selenium.common.exceptions import (
 )
 from selenium.webdriver.common.action_chains import ActionChains
 
+from crawl_frontier import CrawlFrontier, OUTLINK_PRIORITY, PAGINATION_PRIORITY, url_host
+from driver_trace import DriverTracer, traced
+from human_timing import TimingProfile, get_profile
+from selector_cache import SelectorCache
+from page_fingerprint import DuplicateIndex, fingerprint
+from metrics import COUNT_BUCKETS, counter, histogram, timed_function
+
+
+HUMAN_ACTION_SECONDS = histogram(
+    "human_action_seconds", "Wall time of HumanBehavior actions", ["method"], stage="human"
+)
+HUMAN_SCROLL_WEBDRIVER_CALLS = histogram(
+    "human_scroll_webdriver_calls",
+    "WebDriver script calls issued per scroll_down_slowly",
+    buckets=COUNT_BUCKETS,
+)
+HUMAN_FIND_NEXT_TOTAL = counter(
+    "human_find_next_page_total", "find_next_page_button outcomes", ["result"]
+)
+HUMAN_DUPLICATE_PAGES_TOTAL = counter(
+    "human_duplicate_pages_total", "Pages checked against the duplicate index", ["kind"]
+)
+
+
+def _per_call_profile(func):
+    """Let an action take ``profile=`` to run under another timing profile for one call."""
+    @functools.wraps(func)
+    def wrapper(self, *args, profile: Union[str, TimingProfile, None] = None, **kwargs):
+        if profile is None:
+            return func(self, *args, **kwargs)
+        with self.using_profile(profile):
+            return func(self, *args, **kwargs)
+    
+    return wrapper
+
 
 class HumanBehavior:
     """Simulates human-like interactions with web pages."""
@@ -53,18 +89,113 @@ class HumanBehavior:
         "button:contains('Next')",
     ]
     
-    def __init__(self, driver: webdriver.Chrome):
+    def __init__(
+        self,
+        driver: webdriver.Chrome,
+        frontier: Optional[CrawlFrontier] = None,
+        tracer: Optional[DriverTracer] = None,
+        profile: Union[str, TimingProfile, None] = None,
+        seed: Optional[int] = None,
+        selector_cache: Optional[SelectorCache] = None,
+        duplicates: Optional[DuplicateIndex] = None,
+    ):
         self.driver = driver
         self.actions = ActionChains(driver)
+        self.frontier = frontier
+        self.selector_cache = selector_cache
+        self.duplicates = duplicates
+        self._last_locator = None
+        self.script_calls = 0
+        self.tracer = None
+        self.set_tracer(tracer)
+        self.set_profile(profile, seed)
+        # profile name -> [pages, wall seconds, simulated human seconds]
+        self._page_times: Dict[str, List[float]] = {}
+    
+    def set_profile(self, profile: Union[str, TimingProfile, None], seed: Optional[int] = None):
+        """Switch the session's timing profile ("human", "fast" or "virtual")."""
+        self.profile = get_profile(profile, seed)
+        self.clock = self.profile.make_clock()
+        self.rng = self.profile.make_rng()
+        self.simulated_seconds = 0.0
+    
+    @contextmanager
+    def using_profile(self, profile: Union[str, TimingProfile, None], seed: Optional[int] = None):
+        """Temporarily run under another timing profile."""
+        if profile is None:
+            yield self.profile
+            return
+        saved = (self.profile, self.clock, self.rng, self.simulated_seconds)
+        self.set_profile(profile, seed)
+        try:
+            yield self.profile
+        finally:
+            self.profile, self.clock, self.rng, self.simulated_seconds = saved
     
+    def _sleep(self, seconds: float):
+        """Sleep ``seconds`` of human time, scaled (or virtualized) by the profile."""
+        seconds = max(0.0, seconds)
+        self.simulated_seconds += seconds
+        if self.profile.virtual:
+            self.clock.sleep(seconds)
+        else:
+            self.clock.sleep(seconds * self.profile.delay_scale)
+    
+    def _wait_for_navigation(self, previous_url: str, clicked=None):
+        """
+        Poll for a URL change when the profile's delays are too short to cover a page load.
+        
+        Also returns once the clicked element goes stale (the page or the
+        pagination block was re-rendered in place), and gives up after the
+        profile's ``navigation_timeout``.
+        """
+        if not self.profile.wait_for_navigation:
+            return
+        
+        def navigated(driver):
+            if driver.current_url != previous_url:
+                return True
+            return clicked is not None and EC.staleness_of(clicked)(driver)
+        
+        try:
+            WebDriverWait(self.driver, self.profile.navigation_timeout, poll_frequency=0.05).until(navigated)
+        except TimeoutException:
+            pass
+    
+    def timing_stats(self) -> dict:
+        """Realized wall time per page for each profile used by navigate_and_scroll."""
+        stats = {}
+        for name, (pages, wall, simulated) in self._page_times.items():
+            stats[name] = {
+                "pages": int(pages),
+                "wall_seconds_per_page": round(wall / pages, 3) if pages else None,
+                "simulated_seconds_per_page": round(simulated / pages, 3) if pages else None,
+            }
+        return stats
+    
+    def set_tracer(self, tracer: Optional[DriverTracer]):
+        """Enable (or with None, disable) WebDriver command tracing."""
+        if self.tracer is not None:
+            self.tracer.detach()
+        self.tracer = tracer
+        if tracer is not None:
+            tracer.attach(self.driver)
+    
+    def _script(self, script: str, *args):
+        """execute_script wrapper that counts WebDriver round trips."""
+        self.script_calls += 1
+        return self.driver.execute_script(script, *args)
+    
+    @traced
     def random_delay(self, min_seconds: float = 0.5, max_seconds: float = 2.0):
         """Add a random delay to simulate human thinking time."""
-        delay = random.uniform(min_seconds, max_seconds)
-        time.sleep(delay)
+        delay = self.rng.uniform(min_seconds, max_seconds)
+        self._sleep(delay)
     
+    @traced
     def smooth_scroll_to_position(self, target_y: int, duration: float = 1.0):
         """Smoothly scroll to a specific Y position."""
-        current_y = self.driver.execute_script("return window.pageYOffset;")
+        current_y = self._script("return window.pageYOffset;")
         distance = target_y - current_y
         steps = max(10, int(duration * 20))  # 20 steps per second
         
@@ -74,13 +205,16 @@ class HumanBehavior:
             eased_progress = progress * progress * (3 - 2 * progress)
             new_y = current_y + (distance * eased_progress)
             
-            self.driver.execute_script(f"window.scrollTo(0, {new_y});")
-            time.sleep(duration / steps)
+            self._script(f"window.scrollTo(0, {new_y});")
+            self._sleep(duration / steps)
             
             # Add small random variations
-            if random.random() < 0.1:
-                time.sleep(random.uniform(0.05, 0.2))
+            if self.rng.random() < 0.1:
+                self._sleep(self.rng.uniform(0.05, 0.2))
     
+    @timed_function(HUMAN_ACTION_SECONDS, method="scroll_down_slowly")
+    @traced
+    @_per_call_profile
     def scroll_down_slowly(
         self,
         scroll_pause_time: float = 1.5,
@@ -94,16 +228,18 @@ class HumanBehavior:
             scroll_pause_time: Time to pause between scrolls (randomized)
             num_scrolls: Number of scrolls to perform (None = scroll to bottom)
             scroll_percentage: Percentage of viewport to scroll each time
+            profile: Timing profile for this call only ("human", "fast", "virtual")
         """
-        viewport_height = self.driver.execute_script("return window.innerHeight;")
+        calls_before = self.script_calls
+        viewport_height = self._script("return window.innerHeight;")
         scroll_distance = int(viewport_height * scroll_percentage)
         
         scrolls_performed = 0
         
         while True:
             # Get current scroll position
-            current_position = self.driver.execute_script("return window.pageYOffset;")
-            page_height = self.driver.execute_script("return document.body.scrollHeight;")
+            current_position = self._script("return window.pageYOffset;")
+            page_height = self._script("return document.body.scrollHeight;")
             
             # Check if we've reached the bottom or completed requested scrolls
             if num_scrolls and scrolls_performed >= num_scrolls:
@@ -114,29 +250,33 @@ class HumanBehavior:
                 break
             
             # Calculate target position with some randomness
-            target_position = current_position + scroll_distance + random.randint(-50, 50)
+            target_position = current_position + scroll_distance + self.rng.randint(-50, 50)
             
             # Smooth scroll
-            self.smooth_scroll_to_position(target_position, duration=random.uniform(0.8, 1.5))
+            self.smooth_scroll_to_position(target_position, duration=self.rng.uniform(0.8, 1.5))
             
             # Random pause like a human reading
-            pause = scroll_pause_time + random.uniform(-0.5, 1.0)
-            time.sleep(max(0.5, pause))
+            pause = scroll_pause_time + self.rng.uniform(-0.5, 1.0)
+            self._sleep(max(0.5, pause))
             
             # Occasionally scroll back up a bit (like re-reading something)
-            if random.random() < 0.1:
-                scroll_back = random.randint(50, 150)
-                self.driver.execute_script(f"window.scrollBy(0, -{scroll_back});")
-                time.sleep(random.uniform(0.3, 0.8))
+            if self.rng.random() < 0.1:
+                scroll_back = self.rng.randint(50, 150)
+                self._script(f"window.scrollBy(0, -{scroll_back});")
+                self._sleep(self.rng.uniform(0.3, 0.8))
             
             scrolls_performed += 1
+        
+        HUMAN_SCROLL_WEBDRIVER_CALLS.observe(self.script_calls - calls_before)
     
+    @traced
     def scroll_to_element(self, element, offset: int = 100):
         """Scroll smoothly to bring an element into view."""
-        element_y = self.driver.execute_script("return arguments[0].getBoundingClientRect().top + window.pageYOffset;", element)
+        element_y = self._script("return arguments[0].getBoundingClientRect().top + window.pageYOffset;", element)
         target_y = element_y - offset
         self.smooth_scroll_to_position(max(0, target_y), duration=1.2)
     
+    @traced
     def move_to_element_human_like(self, element):
         """Move mouse to element with human-like curve and speed."""
         # Get element location
@@ -144,16 +284,19 @@ class HumanBehavior:
         size = element.size
         
         # Random point within the element
-        target_x = location['x'] + random.randint(int(size['width'] * 0.3), int(size['width'] * 0.7))
-        target_y = location['y'] + random.randint(int(size['height'] * 0.3), int(size['height'] * 0.7))
+        target_x = location['x'] + self.rng.randint(int(size['width'] * 0.3), int(size['width'] * 0.7))
+        target_y = location['y'] + self.rng.randint(int(size['height'] * 0.3), int(size['height'] * 0.7))
         
         # Move with slight randomness
         self.actions.move_to_element_with_offset(element, 
-                                                  random.randint(-5, 5), 
-                                                  random.randint(-5, 5))
-        self.actions.pause(random.uniform(0.1, 0.3))
+                                                  self.rng.randint(-5, 5), 
+                                                  self.rng.randint(-5, 5))
+        self.actions.pause(self.rng.uniform(0.1, 0.3) * self.profile.delay_scale)
         self.actions.perform()
     
+    @timed_function(HUMAN_ACTION_SECONDS, method="human_click")
+    @traced
+    @_per_call_profile
     def human_click(self, element):
         """Click an element with human-like behavior."""
         try:
@@ -170,21 +313,34 @@ class HumanBehavior:
             
         except ElementClickInterceptedException:
             # If click is intercepted, try JavaScript click
-            self.driver.execute_script("arguments[0].click();", element)
+            self._script("arguments[0].click();", element)
     
+    @timed_function(HUMAN_ACTION_SECONDS, method="find_next_page_button")
+    @traced
     def find_next_page_button(self, timeout: int = 10) -> Optional[webdriver.remote.webelement.WebElement]:
         """
         Find the "Next Page" button/link using various strategies.
         
+        With a selector cache, the locator that last worked on this domain is
+        tried first and the full search only runs on a miss.
+        
         Returns:
             The next page element if found, None otherwise.
         """
+        domain = ""
+        if self.selector_cache is not None:
+            domain = url_host(self.driver.current_url)
+            element = self._find_cached_next(domain)
+            if element is not None:
+                HUMAN_FIND_NEXT_TOTAL.inc(result="cache_hit")
+                return element
+        
         strategies = [
             # Strategy 1: Look for links/buttons with "next" text
-            lambda: self._find_by_text_contains(["next", "next page", ">", "»", "→"]),
+            ("text", lambda: self._find_by_text_contains(["next", "next page", ">", "»", "→"])),
             
             # Strategy 2: Look for common pagination classes
-            lambda: self._find_by_selectors([
+            ("selector", lambda: self._find_by_selectors([
                 "a.next",
                 "a.pagination-next",
                 "button.next",
@@ -192,25 +348,52 @@ class HumanBehavior:
                 "li.next a",
                 ".pagination .next",
                 "[aria-label*='next' i]",
-            ]),
+            ])),
             
             # Strategy 3: Look in pagination containers
-            lambda: self._find_next_in_pagination(),
+            ("pagination", lambda: self._find_next_in_pagination()),
             
             # Strategy 4: Look for arrows or icons
-            lambda: self._find_by_aria_label(["next", "siguiente", "suivant", "weiter"]),
+            ("aria_label", lambda: self._find_by_aria_label(["next", "siguiente", "suivant", "weiter"])),
         ]
         
-        for strategy in strategies:
+        for name, strategy in strategies:
             try:
+                self._last_locator = None
                 element = strategy()
                 if element and element.is_displayed() and element.is_enabled():
+                    HUMAN_FIND_NEXT_TOTAL.inc(result="found")
+                    if self.selector_cache is not None and self._last_locator:
+                        self.selector_cache.learn(domain, name, self._last_locator)
                     return element
             except (NoSuchElementException, StaleElementReferenceException):
                 continue
         
+        HUMAN_FIND_NEXT_TOTAL.inc(result="not_found")
         return None
     
+    @traced
+    def _find_cached_next(self, domain: str) -> Optional[webdriver.remote.webelement.WebElement]:
+        """Try the locator learned for ``domain``; record the hit or miss."""
+        cached = self.selector_cache.lookup(domain)
+        if cached is None:
+            return None
+        
+        _, locator = cached
+        try:
+            element = self.driver
+            for by, value in locator:
+                element = element.find_element(by, value)
+            if element.is_displayed() and element.is_enabled():
+                self.selector_cache.record_hit(domain)
+                return element
+        except (NoSuchElementException, StaleElementReferenceException):
+            pass
+        
+        self.selector_cache.record_miss(domain)
+        return None
+    
+    @traced
     def _find_by_text_contains(self, texts: List[str]) -> Optional[webdriver.remote.webelement.WebElement]:
         """Find element by text content."""
         for text in texts:
@@ -219,6 +402,7 @@ class HumanBehavior:
                 xpath = f"//a[contains(translate(text(), 'ABCDEFGHIJKLMNOPQRSTUVWXYZ', 'abcdefghijklmnopqrstuvwxyz'), '{text.lower()}')]"
                 element = self.driver.find_element(By.XPATH, xpath)
                 if element.is_displayed():
+                    self._last_locator = [(By.XPATH, xpath)]
                     return element
             except NoSuchElementException:
                 pass
@@ -228,23 +412,27 @@ class HumanBehavior:
                 xpath = f"//button[contains(translate(text(), 'ABCDEFGHIJKLMNOPQRSTUVWXYZ', 'abcdefghijklmnopqrstuvwxyz'), '{text.lower()}')]"
                 element = self.driver.find_element(By.XPATH, xpath)
                 if element.is_displayed():
+                    self._last_locator = [(By.XPATH, xpath)]
                     return element
             except NoSuchElementException:
                 pass
         
         return None
     
+    @traced
     def _find_by_selectors(self, selectors: List[str]) -> Optional[webdriver.remote.webelement.WebElement]:
         """Find element by CSS selectors."""
         for selector in selectors:
             try:
                 element = self.driver.find_element(By.CSS_SELECTOR, selector)
                 if element.is_displayed():
+                    self._last_locator = [(By.CSS_SELECTOR, selector)]
                     return element
             except NoSuchElementException:
                 continue
         return None
     
+    @traced
     def _find_next_in_pagination(self) -> Optional[webdriver.remote.webelement.WebElement]:
         """Find next button within pagination containers."""
         pagination_selectors = [
@@ -264,6 +452,7 @@ class HumanBehavior:
                         xpath = f".//a[contains(translate(text(), 'ABCDEFGHIJKLMNOPQRSTUVWXYZ', 'abcdefghijklmnopqrstuvwxyz'), '{text}')]"
                         element = container.find_element(By.XPATH, xpath)
                         if element.is_displayed():
+                            self._last_locator = [(By.CSS_SELECTOR, selector), (By.XPATH, xpath)]
                             return element
                     except NoSuchElementException:
                         continue
@@ -272,25 +461,77 @@ class HumanBehavior:
         
         return None
     
+    @traced
     def _find_by_aria_label(self, labels: List[str]) -> Optional[webdriver.remote.webelement.WebElement]:
         """Find element by aria-label attribute."""
         for label in labels:
             try:
-                element = self.driver.find_element(
-                    By.XPATH, 
-                    f"//*[contains(translate(@aria-label, 'ABCDEFGHIJKLMNOPQRSTUVWXYZ', 'abcdefghijklmnopqrstuvwxyz'), '{label.lower()}')]"
-                )
+                xpath = f"//*[contains(translate(@aria-label, 'ABCDEFGHIJKLMNOPQRSTUVWXYZ', 'abcdefghijklmnopqrstuvwxyz'), '{label.lower()}')]"
+                element = self.driver.find_element(By.XPATH, xpath)
                 if element.is_displayed():
+                    self._last_locator = [(By.XPATH, xpath)]
                     return element
             except NoSuchElementException:
                 continue
         return None
     
+    @traced
+    def get_href(self, element) -> Optional[str]:
+        """Return the absolute href of a link element, if it has one."""
+        try:
+            href = element.get_attribute("href")
+        except StaleElementReferenceException:
+            return None
+        if href and href.startswith(("http://", "https://")):
+            return href
+        return None
+    
+    @traced
+    def discover_links(self, depth: int = 0, limit: int = 200) -> int:
+        """
+        Queue the page's outlinks in the crawl frontier.
+        
+        Returns:
+            Number of newly discovered URLs.
+        """
+        if self.frontier is None:
+            return 0
+        hrefs = self._script(
+            "return Array.from(document.querySelectorAll('a[href]'), a => a.href);"
+        ) or []
+        source = self.driver.current_url
+        added = 0
+        for href in hrefs[:limit]:
+            if self.frontier.add(href, depth=depth + 1, priority=OUTLINK_PRIORITY, source=source):
+                added += 1
+        return added
+    
+    @traced
+    def check_duplicate(self) -> Optional[dict]:
+        """
+        Fingerprint the current page's visible text against the duplicate index.
+        
+        Returns:
+            The index's match dict, or None without an index.
+        """
+        if self.duplicates is None:
+            return None
+        text = self._script("return document.body ? document.body.innerText : '';") or ""
+        match = self.duplicates.check(self.driver.current_url, fingerprint(text=text))
+        HUMAN_DUPLICATE_PAGES_TOTAL.inc(kind=match["kind"] or "unique")
+        return match
+    
+    @timed_function(HUMAN_ACTION_SECONDS, method="navigate_and_scroll")
+    @traced
+    @_per_call_profile
     def navigate_and_scroll(
         self,
         url: str,
         scroll_count: Optional[int] = None,
         find_next: bool = True,
+        depth: int = 0,
+        discover: bool = False,
+        skip_duplicates: bool = False,
     ) -> dict:
         """
         Navigate to URL, scroll like a human, and optionally click next page.
@@ -299,10 +540,47 @@ class HumanBehavior:
             url: URL to navigate to
             scroll_count: Number of scrolls (None = scroll to bottom)
             find_next: Whether to try finding and clicking next page button
+            depth: Link depth of ``url`` from the crawl start (frontier limits)
+            discover: Queue the page's outlinks in the frontier
+            skip_duplicates: Stop (no scrolling or next page) when the page
+                repeats content already seen; needs a duplicate index
+            profile: Timing profile for this call only ("human", "fast", "virtual")
         
         Returns:
-            Dictionary with navigation results
+            Dictionary with navigation results, including the realized
+            time per page under the active timing profile
         """
+        started = time.perf_counter()
+        simulated_before = self.simulated_seconds
+        
+        result = self._navigate_and_scroll(url, scroll_count, find_next, depth, discover, skip_duplicates)
+        
+        wall = time.perf_counter() - started
+        simulated = self.simulated_seconds - simulated_before
+        pages = 2 if result["next_page_clicked"] else 1
+        totals = self._page_times.setdefault(self.profile.name, [0, 0.0, 0.0])
+        totals[0] += pages
+        totals[1] += wall
+        totals[2] += simulated
+        result["timing"] = {
+            "profile": self.profile.name,
+            "pages": pages,
+            "wall_seconds": round(wall, 3),
+            "simulated_seconds": round(simulated, 3),
+            "time_per_page_seconds": round(wall / pages, 3),
+        }
+        return result
+    
+    def _navigate_and_scroll(
+        self,
+        url: str,
+        scroll_count: Optional[int],
+        find_next: bool,
+        depth: int,
+        discover: bool,
+        skip_duplicates: bool,
+    ) -> dict:
+        """Body of navigate_and_scroll; the wrapper adds per-page timing."""
         result = {
             "url": url,
             "success": False,
@@ -318,6 +596,15 @@ class HumanBehavior:
             self.random_delay(1.0, 2.5)  # Wait for page load
             
             result["success"] = True
+            if self.frontier is not None:
+                result["new_page"] = self.frontier.mark_visited(self.driver.current_url)
+                if discover:
+                    result["links_discovered"] = self.discover_links(depth)
+            
+            if self.duplicates is not None:
+                result["duplicate"] = self.check_duplicate()
+                if skip_duplicates and result["duplicate"]["duplicate"]:
+                    return result
             
             # Scroll down slowly
             self.scroll_down_slowly(
@@ -335,14 +622,40 @@ class HumanBehavior:
                 if next_button:
                     result["next_page_found"] = True
                     
+                    next_href = None
+                    if self.frontier is not None:
+                        next_href = self.get_href(next_button)
+                        # Script-driven controls have no href; check the host they run on
+                        target = next_href or self.driver.current_url
+                        if (next_href and self.frontier.is_visited(next_href)) or not self.frontier.allows(
+                            target, depth + 1
+                        ):
+                            # Circular pagination or over the host/depth limit
+                            result["next_page_skipped"] = target
+                            return result
+                        if next_href:
+                            self.frontier.add(next_href, depth=depth + 1, priority=PAGINATION_PRIORITY)
+                    
                     try:
+                        previous_url = self.driver.current_url
                         self.human_click(next_button)
+                        self._wait_for_navigation(previous_url, next_button)
                         result["next_page_clicked"] = True
                         result["next_url"] = self.driver.current_url
                         
                         # Wait for new page to load
                         self.random_delay(1.5, 2.5)
                         
+                        if self.frontier is not None:
+                            result["next_url"] = self.driver.current_url
+                            result["next_page_new"] = self.frontier.mark_visited(result["next_url"])
+                            if not result["next_page_new"] and not next_href:
+                                # The control led back to a visited page; stop instead of looping
+                                result["next_page_skipped"] = result["next_url"]
+                                return result
+                        if self.duplicates is not None:
+                            result["next_page_duplicate"] = self.check_duplicate()
+                        
                     except Exception as e:
                         result["error"] = f"Failed to click next button: {str(e)}"
                 
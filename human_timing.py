@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Clocks and timing profiles for HumanBehavior.
+
+A profile decides how much of HumanBehavior's simulated "human" time is
+actually slept:
+
+    human     real sleeps at full length (the streamed demo)
+    fast      same action sequence, delays scaled down for batch crawls
+    virtual   no real sleeping; a virtual clock advances instead and the RNG
+              is seeded, so runs are reproducible in tests and benchmarks
+
+Usage:
+    human = HumanBehavior(driver, profile="fast")
+    with human.using_profile("virtual"):
+        human.scroll_down_slowly(num_scrolls=3)
+"""
+
+from __future__ import annotations
+
+import os
+import random
+import threading
+import time
+from dataclasses import dataclass, replace
+from typing import Dict, Optional, Union
+
+
+class RealClock:
+    """Wall-clock sleeping."""
+
+    def sleep(self, seconds: float) -> None:
+        if seconds > 0:
+            time.sleep(seconds)
+
+    def now(self) -> float:
+        return time.monotonic()
+
+
+class VirtualClock:
+    """Advances a counter instead of sleeping."""
+
+    def __init__(self, start: float = 0.0):
+        self._now = start
+        self._lock = threading.Lock()
+
+    def sleep(self, seconds: float) -> None:
+        if seconds > 0:
+            with self._lock:
+                self._now += seconds
+
+    def now(self) -> float:
+        return self._now
+
+
+@dataclass(frozen=True)
+class TimingProfile:
+    name: str
+    delay_scale: float = 1.0
+    virtual: bool = False
+    seed: Optional[int] = None
+    # Short delays no longer cover page loads, so poll for the URL change instead
+    wait_for_navigation: bool = False
+    # Upper bound on that poll; in-place (AJAX) pagination never changes the URL
+    navigation_timeout: float = 2.0
+
+    def make_clock(self):
+        return VirtualClock() if self.virtual else RealClock()
+
+    def make_rng(self) -> random.Random:
+        return random.Random(self.seed)
+
+
+PROFILES: Dict[str, TimingProfile] = {
+    "human": TimingProfile("human"),
+    "fast": TimingProfile(
+        "fast",
+        delay_scale=float(os.environ.get("HUMAN_FAST_SCALE", "0.1")),
+        wait_for_navigation=True,
+    ),
+    "virtual": TimingProfile("virtual", delay_scale=0.0, virtual=True, seed=0, wait_for_navigation=True),
+}
+
+
+def get_profile(profile: Union[str, TimingProfile, None], seed: Optional[int] = None) -> TimingProfile:
+    """Resolve a profile name (or pass an instance through), optionally overriding its seed."""
+    if profile is None:
+        profile = os.environ.get("HUMAN_PROFILE", "human")
+    if isinstance(profile, str):
+        try:
+            profile = PROFILES[profile]
+        except KeyError:
+            raise ValueError(
+                f"Unknown timing profile {profile!r}; expected one of {', '.join(PROFILES)}"
+            ) from None
+    if seed is not None:
+        profile = replace(profile, seed=seed)
+    return profile
@@ -0,0 +1,319 @@
+#!/usr/bin/env python3
+"""
+Lightweight Prometheus-style metrics for the capture, encode and behavior paths.
+
+Counters, gauges and histograms live in a process-wide registry and render in
+the Prometheus text exposition format for a ``/metrics`` endpoint. Timing
+hooks are context managers; with ``METRICS_ENABLED=0`` they return a shared
+no-op object so the hot paths pay only a flag check.
+
+Inside a :func:`request_timings` block every timed stage is also added to a
+per-request breakdown, which endpoints return alongside their result.
+
+Usage:
+    SCREENSHOT = histogram("stream_screenshot_seconds", "Screenshot latency")
+    with timed(SCREENSHOT):
+        png = driver.get_screenshot_as_png()
+"""
+
+from __future__ import annotations
+
+import bisect
+import functools
+import os
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+
+METRICS_ENABLED = os.environ.get("METRICS_ENABLED", "1") == "1"
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+COUNT_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000)
+
+_NOOP = nullcontext()
+_local = threading.local()
+
+
+def _label_key(labelnames: Sequence[str], labels: Dict[str, str]) -> Tuple[str, ...]:
+    return tuple(str(labels.get(name, "")) for name in labelnames)
+
+
+def _format_labels(labelnames: Sequence[str], key: Tuple[str, ...], extra: str = "") -> str:
+    parts = [
+        f'{name}="{value.replace(chr(92), chr(92) * 2).replace(chr(34), chr(92) + chr(34))}"'
+        for name, value in zip(labelnames, key)
+    ]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class _Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _header(self) -> List[str]:
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        if not METRICS_ENABLED:
+            return
+        key = _label_key(self.labelnames, labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def render(self) -> List[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        return self._header() + [
+            f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"
+            for key, value in items
+        ]
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def set(self, value: float, **labels: str) -> None:
+        key = _label_key(self.labelnames, labels)
+        with self._lock:
+            self._values[key] = value
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        key = _label_key(self.labelnames, labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def dec(self, amount: float = 1.0, **labels: str) -> None:
+        self.inc(-amount, **labels)
+
+    def render(self) -> List[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        return self._header() + [
+            f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"
+            for key, value in items
+        ]
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+        stage: Optional[str] = None,
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self.stage = stage or name
+        # label key -> (per-bucket counts + overflow, sum, count)
+        self._values: Dict[Tuple[str, ...], Tuple[List[int], float, int]] = {}
+
+    def observe(self, value: float, **labels: str) -> None:
+        if not METRICS_ENABLED:
+            return
+        key = _label_key(self.labelnames, labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            counts, total, count = self._values.get(key) or ([0] * (len(self.buckets) + 1), 0.0, 0)
+            counts[index] += 1
+            self._values[key] = (counts, total + value, count + 1)
+
+    def render(self) -> List[str]:
+        with self._lock:
+            items = sorted((key, (list(c), s, n)) for key, (c, s, n) in self._values.items())
+        lines = self._header()
+        for key, (counts, total, count) in items:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += bucket_count
+                le = f'le="{_format_value(bound)}"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, le)} {cumulative}")
+            label_str = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{label_str} {_format_value(total)}")
+            lines.append(f"{self.name}_count{label_str} {count}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric: _Metric) -> _Metric:
+        with self._lock:
+            # Re-importing a module (e.g. in a reloader) must not duplicate metrics
+            return self._metrics.setdefault(metric.name, metric)
+
+    def render(self) -> str:
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines: List[str] = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+
+def counter(name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+    return REGISTRY.register(Counter(name, documentation, labelnames))
+
+
+def gauge(name: str, documentation: str, labelnames: Sequence[str] = ()) -> Gauge:
+    return REGISTRY.register(Gauge(name, documentation, labelnames))
+
+
+def histogram(
+    name: str,
+    documentation: str,
+    labelnames: Sequence[str] = (),
+    buckets: Sequence[float] = DEFAULT_BUCKETS,
+    stage: Optional[str] = None,
+) -> Histogram:
+    return REGISTRY.register(Histogram(name, documentation, labelnames, buckets, stage))
+
+
+def render() -> str:
+    return REGISTRY.render()
+
+
+# ---------------------------------------------------------------------- #
+# Timing hooks
+# ---------------------------------------------------------------------- #
+
+class RequestTimings:
+    """Per-request breakdown of time spent in each timed stage."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.stages: Dict[str, List[float]] = {}
+
+    def add(self, stage: str, seconds: float) -> None:
+        entry = self.stages.setdefault(stage, [0.0, 0])
+        entry[0] += seconds
+        entry[1] += 1
+
+    def as_dict(self) -> dict:
+        breakdown = {
+            stage: {"ms": round(total * 1000, 2), "count": count}
+            for stage, (total, count) in self.stages.items()
+        }
+        return {
+            "total_ms": round((time.perf_counter() - self.started) * 1000, 2),
+            "stages": breakdown,
+        }
+
+
+@contextmanager
+def request_timings() -> Iterator[RequestTimings]:
+    """Collect a breakdown of every timed stage run by this thread."""
+    timings = RequestTimings()
+    previous = getattr(_local, "timings", None)
+    _local.timings = timings
+    try:
+        yield timings
+    finally:
+        _local.timings = previous
+
+
+class _Timer:
+    __slots__ = ("metric", "labels", "started")
+
+    def __init__(self, metric: Histogram, labels: Dict[str, str]):
+        self.metric = metric
+        self.labels = labels
+
+    def __enter__(self) -> "_Timer":
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        elapsed = time.perf_counter() - self.started
+        self.metric.observe(elapsed, **self.labels)
+        timings = getattr(_local, "timings", None)
+        if timings is not None:
+            stage = self.metric.stage
+            if self.labels:
+                stage = f"{stage}[{','.join(str(v) for v in self.labels.values())}]"
+            timings.add(stage, elapsed)
+
+
+def timed(metric: Histogram, **labels: str):
+    """Time a block into ``metric`` (and the active request breakdown, if any)."""
+    if not METRICS_ENABLED:
+        return _NOOP
+    return _Timer(metric, labels)
+
+
+class _TimedLock:
+    __slots__ = ("lock", "metric", "labels")
+
+    def __init__(self, lock, metric: Histogram, labels: Dict[str, str]):
+        self.lock = lock
+        self.metric = metric
+        self.labels = labels
+
+    def __enter__(self):
+        with _Timer(self.metric, self.labels):
+            self.lock.acquire()
+        return self.lock
+
+    def __exit__(self, *exc) -> None:
+        self.lock.release()
+
+
+def locked(lock, metric: Histogram, **labels: str):
+    """Acquire ``lock`` as a context manager, timing the wait into ``metric``."""
+    if not METRICS_ENABLED:
+        return lock
+    return _TimedLock(lock, metric, labels)
+
+
+def timed_function(metric: Histogram, **labels: str):
+    """Decorator form of :func:`timed`; a no-op when metrics are disabled."""
+    def decorator(func):
+        if not METRICS_ENABLED:
+            return func
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with _Timer(metric, labels):
+                return func(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
@@ -11,15 +11,32 @@ from __future__ import annotations
 import os
 from datetime import datetime, timezone
 
-from flask import Flask, jsonify, request
+from flask import Flask, Response, jsonify, request
 
-from selenium_worker import run_worker
+import metrics
+from crawl_archive import CrawlArchive
+from metrics import histogram, timed
+from page_fingerprint import DuplicateIndex, fingerprint
+from selenium_worker import fetch_page, redact_proxy_url
 
 
 DEFAULT_TARGET = "https://httpbin.org/ip"
+CRAWL_ARCHIVE_DIR = os.environ.get("CRAWL_ARCHIVE_DIR", "crawl_archive")  # Empty = don't archive
+ARCHIVE_SEGMENT_MB = int(os.environ.get("ARCHIVE_SEGMENT_MB", "256"))
+DEDUP_ENABLED = os.environ.get("DEDUP_ENABLED", "1") == "1"
+DEDUP_MAX_DISTANCE = int(os.environ.get("DEDUP_MAX_DISTANCE", "10"))  # SimHash bits
+
+ARCHIVE_WRITE_SECONDS = histogram("archive_write_seconds", "Crawl archive append latency", stage="archive_write")
+DEDUP_CHECK_SECONDS = histogram("dedup_check_seconds", "Page fingerprint and duplicate lookup time", stage="dedup")
 
 
 app = Flask(__name__)
+_archive = (
+    CrawlArchive(CRAWL_ARCHIVE_DIR, segment_max_bytes=ARCHIVE_SEGMENT_MB * 1024 * 1024)
+    if CRAWL_ARCHIVE_DIR
+    else None
+)
+_duplicates = DuplicateIndex(max_distance=DEDUP_MAX_DISTANCE) if DEDUP_ENABLED else None
 
 
 @app.route("/run", methods=["POST", "GET"])
@@ -27,8 +44,24 @@ def run():
     payload = request.get_json(silent=True) or {}
     target_url = payload.get("target_url") or request.args.get("target_url") or DEFAULT_TARGET
     proxy_url = payload.get("proxy_url") or request.args.get("proxy_url") or os.environ.get("PROXY_URL")
+    # Don't archive or return content for pages that repeat one already seen
+    skip_duplicates = bool(payload.get("skip_duplicates")) or request.args.get("skip_duplicates") in ("1", "true")
+
+    with metrics.request_timings() as timings:
+        page = fetch_page(target_url, proxy_url)
+        html = page["html"]
 
-    html = run_worker(target_url, proxy_url)
+        duplicate = None
+        if _duplicates is not None:
+            with timed(DEDUP_CHECK_SECONDS):
+                duplicate = _duplicates.check(page["final_url"] or target_url, fingerprint(html=html))
+        skipped = skip_duplicates and duplicate is not None and duplicate["duplicate"]
+
+        archived = None
+        if _archive is not None and not skipped:
+            with timed(ARCHIVE_WRITE_SECONDS):
+                entry = _archive.put(page)
+            archived = {"segment": entry.segment, "offset": entry.offset, "length": entry.length}
 
     return jsonify(
         {
@@ -36,16 +69,85 @@ def run():
             "target_url": target_url,
             "proxy_url": proxy_url,
             "timestamp": datetime.now(timezone.utc).isoformat(),
-            "payload_preview": html[:500],
+            "payload_preview": "" if skipped else html[:500],
+            "archived": archived,
+            "duplicate": duplicate,
+            "skipped": skipped,
+            "timings": timings.as_dict(),
         }
     )
 
 
+@app.route("/archive")
+def archive():
+    """Look up an archived page by URL, or list pages fetched in a time range."""
+    if _archive is None:
+        return jsonify({"error": "Archive disabled (CRAWL_ARCHIVE_DIR is empty)"}), 404
+
+    url = request.args.get("url")
+    if url:
+        at = request.args.get("at", type=float)
+        record = _archive.get(url, at=at)
+        if record is None:
+            return jsonify({"error": "URL not archived", "url": url}), 404
+        # Records written before proxy redaction may still carry credentials
+        record["proxy_url"] = redact_proxy_url(record.get("proxy_url"))
+        return jsonify(record)
+
+    start = request.args.get("from", 0.0, type=float)
+    end = request.args.get("to", type=float)
+    limit = request.args.get("limit", 100, type=int)
+    pages = []
+    for record in _archive.iter_range(start, end):
+        if len(pages) >= limit:
+            break
+        pages.append({
+            "url": record["url"],
+            "fetched_at": record["fetched_at"],
+            "status": record.get("status"),
+            "bytes": len(record.get("html") or ""),
+        })
+    return jsonify({"stats": _archive.stats(), "pages": pages})
+
+
+@app.route("/archive/compact", methods=["POST"])
+def archive_compact():
+    if _archive is None:
+        return jsonify({"error": "Archive disabled (CRAWL_ARCHIVE_DIR is empty)"}), 404
+    data = request.get_json(silent=True) or {}
+    try:
+        keep_versions = int(data.get("keep_versions", 1))
+        before = data.get("before")
+        before = None if before is None else float(before)
+    except (TypeError, ValueError):
+        return jsonify({"error": "keep_versions must be an integer and before an epoch timestamp"}), 400
+    if keep_versions < 1:
+        # Zero would delete every record fetched before the cutoff (or all of them)
+        return jsonify({"error": "keep_versions must be at least 1"}), 400
+    return jsonify(_archive.compact(keep_versions=keep_versions, before=before))
+
+
+@app.route("/duplicates", methods=["GET", "DELETE"])
+def duplicates():
+    """Per-domain duplicate rates; DELETE clears the fingerprint index."""
+    if _duplicates is None:
+        return jsonify({"error": "Duplicate detection disabled (set DEDUP_ENABLED=1)"}), 404
+    if request.method == "DELETE":
+        _duplicates.clear()
+        return jsonify({"success": True})
+    return jsonify(_duplicates.stats())
+
+
 @app.route("/healthz")
 def healthz():
     return jsonify({"status": "ok"})
 
 
+@app.route("/metrics")
+def metrics_endpoint():
+    return Response(metrics.render(), mimetype=metrics.CONTENT_TYPE)
+
+
 if __name__ == "__main__":
     host = os.environ.get("HOST", "0.0.0.0")
     port = int(os.environ.get("PORT", "5000"))
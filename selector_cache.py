@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+"""
+Per-domain cache of the locator that last found a working next-page control.
+
+``HumanBehavior.find_next_page_button`` tries the cached locator first and
+runs its full strategy search only on a miss. An entry is dropped after
+``max_failures`` consecutive misses. The cache is saved to a JSON file so a
+restarted process keeps what it learned.
+
+A locator is a list of ``(by, value)`` steps applied with chained
+``find_element`` calls, e.g. a pagination container followed by the link
+inside it.
+
+Usage:
+    cache = SelectorCache("selector_cache.json")
+    human = HumanBehavior(driver, selector_cache=cache)
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import time
+from threading import Lock
+from typing import Dict, List, Optional, Sequence, Tuple
+
+
+Locator = List[Tuple[str, str]]
+
+
+class SelectorCache:
+    """Domain -> learned next-page locator, with hit/miss statistics."""
+
+    def __init__(self, path: Optional[str] = None, max_failures: int = 3, save_interval: float = 5.0):
+        self.path = path
+        self.max_failures = max_failures
+        self.save_interval = save_interval
+        self._lock = Lock()
+        self._entries: Dict[str, dict] = {}
+        self._stats = {"hits": 0, "misses": 0, "learned": 0, "invalidated": 0}
+        self._dirty = False
+        self._last_save = 0.0
+        self._load()
+
+    # ------------------------------------------------------------------ #
+    # Persistence
+    # ------------------------------------------------------------------ #
+
+    def _load(self) -> None:
+        if not self.path or not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, "r", encoding="utf-8") as fh:
+                data = json.load(fh)
+        except (OSError, ValueError) as exc:
+            print(f"Selector cache not loaded ({exc}); starting empty")
+            return
+        for domain, entry in data.get("domains", {}).items():
+            entry["locator"] = [tuple(step) for step in entry.get("locator", [])]
+            if entry["locator"]:
+                self._entries[domain] = entry
+
+    def _save_locked(self, force: bool = False) -> None:
+        if not self.path or not self._dirty:
+            return
+        now = time.time()
+        if not force and now - self._last_save < self.save_interval:
+            return
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as fh:
+            json.dump({"domains": self._entries}, fh, indent=2, ensure_ascii=False)
+        os.replace(tmp_path, self.path)
+        self._dirty = False
+        self._last_save = now
+
+    def flush(self) -> None:
+        with self._lock:
+            self._save_locked(force=True)
+
+    # ------------------------------------------------------------------ #
+    # Cache operations
+    # ------------------------------------------------------------------ #
+
+    def lookup(self, domain: str) -> Optional[Tuple[str, Locator]]:
+        """Return ``(strategy, locator)`` learned for ``domain``, if any."""
+        with self._lock:
+            entry = self._entries.get(domain)
+            if entry is None:
+                return None
+            return entry["strategy"], list(entry["locator"])
+
+    def record_hit(self, domain: str) -> None:
+        with self._lock:
+            self._stats["hits"] += 1
+            entry = self._entries.get(domain)
+            if entry is not None:
+                entry["hits"] += 1
+                entry["failures"] = 0
+                entry["last_hit"] = time.time()
+                self._dirty = True
+            self._save_locked()
+
+    def record_miss(self, domain: str) -> None:
+        """Count a miss; drop the domain's entry after too many in a row."""
+        with self._lock:
+            self._stats["misses"] += 1
+            entry = self._entries.get(domain)
+            if entry is None:
+                return
+            entry["failures"] += 1
+            if entry["failures"] >= self.max_failures:
+                del self._entries[domain]
+                self._stats["invalidated"] += 1
+            self._dirty = True
+            self._save_locked(force=True)
+
+    def learn(self, domain: str, strategy: str, locator: Sequence[Tuple[str, str]]) -> None:
+        """Remember the locator the full search just found for ``domain``."""
+        if not domain or not locator:
+            return
+        with self._lock:
+            current = self._entries.get(domain)
+            if current and current["locator"] == list(locator):
+                current["failures"] = 0
+            else:
+                self._entries[domain] = {
+                    "strategy": strategy,
+                    "locator": list(locator),
+                    "hits": 0,
+                    "failures": 0,
+                    "learned_at": time.time(),
+                    "last_hit": None,
+                }
+                self._stats["learned"] += 1
+            self._dirty = True
+            self._save_locked(force=True)
+
+    def forget(self, domain: Optional[str] = None) -> None:
+        """Drop one domain's entry, or everything when ``domain`` is None."""
+        with self._lock:
+            if domain is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(domain, None)
+            self._dirty = True
+            self._save_locked(force=True)
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self._stats["hits"] + self._stats["misses"]
+            return {
+                **self._stats,
+                "hit_rate": round(self._stats["hits"] / lookups, 3) if lookups else None,
+                "domains": {
+                    domain: {
+                        "strategy": entry["strategy"],
+                        "locator": entry["locator"],
+                        "hits": entry["hits"],
+                        "failures": entry["failures"],
+                    }
+                    for domain, entry in self._entries.items()
+                },
+                "path": self.path,
+            }
@@ -13,12 +13,22 @@ import os
 import shutil
 import subprocess
 import sys
-from contextlib import contextmanager
+import time
+from contextlib import ExitStack, contextmanager
+from urllib.parse import urlsplit, urlunsplit
 
 from selenium import webdriver
 from selenium.common.exceptions import WebDriverException
 from selenium.webdriver.chrome.options import Options
 
+from metrics import counter, histogram, timed
+
+
+WORKER_STAGE_SECONDS = histogram(
+    "worker_stage_seconds", "run_worker time per stage", ["stage"], stage="worker"
+)
+WORKER_RUNS_TOTAL = counter("worker_runs_total", "run_worker invocations", ["outcome"])
+
 
 def _is_truthy(value: str | None, default: bool = False) -> bool:
     if value is None:
@@ -26,6 +36,16 @@ def _is_truthy(value: str | None, default: bool = False) -> bool:
     return value.lower() not in {"0", "false", "no", "off"}
 
 
+def redact_proxy_url(proxy_url: str | None) -> str | None:
+    """Drop ``user:pass@`` from a proxy URL so credentials never reach stored records."""
+    if not proxy_url:
+        return proxy_url
+    parts = urlsplit(proxy_url)
+    if "@" not in parts.netloc:
+        return proxy_url
+    return urlunsplit(parts._replace(netloc=parts.netloc.rsplit("@", 1)[1]))
+
+
 def _gpu_available() -> bool:
     if not _is_truthy(os.environ.get("GPU_ENABLED"), default=True):
         return False
@@ -103,10 +123,73 @@ def create_driver(proxy_url: str | None = None):
         driver.quit()
 
 
+_NAVIGATION_TIMING_SCRIPT = """
+const nav = performance.getEntriesByType('navigation')[0];
+if (!nav) { return null; }
+return {
+    status: nav.responseStatus || null,
+    content_type: document.contentType,
+    transfer_size: nav.transferSize,
+    dns_ms: nav.domainLookupEnd - nav.domainLookupStart,
+    connect_ms: nav.connectEnd - nav.connectStart,
+    ttfb_ms: nav.responseStart - nav.requestStart,
+    response_ms: nav.responseEnd - nav.responseStart,
+    dom_content_loaded_ms: nav.domContentLoadedEventEnd,
+    load_ms: nav.loadEventEnd,
+};
+"""
+
+
+def _timed_quit(driver_exit: ExitStack) -> None:
+    with timed(WORKER_STAGE_SECONDS, stage="driver_quit"):
+        driver_exit.close()
+
+
+def fetch_page(url: str, proxy_url: str | None = None) -> dict:
+    """Load ``url`` and return the page source with fetch metadata and timings."""
+    fetched_at = time.time()
+    started = time.perf_counter()
+    try:
+        with ExitStack() as stack:
+            with timed(WORKER_STAGE_SECONDS, stage="driver_start"):
+                driver = stack.enter_context(create_driver(proxy_url))
+            # Re-register the driver's exit so the quit is timed as its own stage
+            stack.callback(_timed_quit, stack.pop_all())
+            driver_ready = time.perf_counter()
+            with timed(WORKER_STAGE_SECONDS, stage="page_load"):
+                driver.get(url)
+            loaded = time.perf_counter()
+            with timed(WORKER_STAGE_SECONDS, stage="page_source"):
+                html = driver.page_source
+                final_url = driver.current_url
+            try:
+                navigation = driver.execute_script(_NAVIGATION_TIMING_SCRIPT) or {}
+            except WebDriverException:
+                navigation = {}
+    except Exception:
+        WORKER_RUNS_TOTAL.inc(outcome="error")
+        raise
+    WORKER_RUNS_TOTAL.inc(outcome="ok")
+
+    return {
+        "url": url,
+        "final_url": final_url,
+        "fetched_at": fetched_at,
+        "proxy_url": redact_proxy_url(proxy_url),
+        "status": navigation.pop("status", None),
+        "headers": {"content-type": navigation.pop("content_type", None)},
+        "timings": {
+            "driver_start_ms": round((driver_ready - started) * 1000, 1),
+            "get_ms": round((loaded - driver_ready) * 1000, 1),
+            "total_ms": round((time.perf_counter() - started) * 1000, 1),
+            **navigation,
+        },
+        "html": html,
+    }
+
+
 def run_worker(url: str, proxy_url: str | None = None) -> str:
-    with create_driver(proxy_url) as driver:
-        driver.get(url)
-        return driver.page_source
+    return fetch_page(url, proxy_url)["html"]
 
 
 def main(argv: list[str]) -> int:
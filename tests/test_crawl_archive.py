@@ -0,0 +1,91 @@
+import pytest
+
+from crawl_archive import CrawlArchive
+
+
+def _page(url, fetched_at, html="<html></html>"):
+    return {"url": url, "fetched_at": fetched_at, "html": html, "status": 200}
+
+
+def test_put_get_and_versions(tmp_path):
+    archive = CrawlArchive(str(tmp_path))
+    archive.put(_page("https://a.example/", 100.0, "v1"))
+    archive.put(_page("https://a.example/?utm_source=x", 200.0, "v2"))
+    archive.put(_page("https://b.example/", 150.0))
+
+    assert archive.get("https://a.example")["html"] == "v2"
+    assert archive.get("https://a.example/", at=150.0)["html"] == "v1"
+    assert archive.get("https://a.example/", at=50.0) is None
+    assert archive.get("https://missing.example/") is None
+    assert [e.fetched_at for e in archive.versions("https://a.example/")] == [100.0, 200.0]
+    assert [r["fetched_at"] for r in archive.iter_range(120.0, 250.0)] == [150.0, 200.0]
+    archive.close()
+
+
+def test_segments_roll_over(tmp_path):
+    archive = CrawlArchive(str(tmp_path), segment_max_bytes=256)
+    for i in range(20):
+        archive.put(_page(f"https://a.example/{i}", float(i), "x" * 200 + str(i)))
+    assert archive.stats()["segments"] > 1
+    assert archive.get("https://a.example/7")["html"].endswith("7")
+    archive.close()
+
+
+def test_writes_from_one_instance_are_visible_to_another(tmp_path):
+    writer = CrawlArchive(str(tmp_path))
+    reader = CrawlArchive(str(tmp_path))
+    writer.put(_page("https://a.example/", 100.0, "first"))
+    assert reader.get("https://a.example/")["html"] == "first"
+    reader.put(_page("https://a.example/", 200.0, "second"))
+    assert writer.get("https://a.example/")["html"] == "second"
+    writer.close()
+    reader.close()
+
+
+def test_compact_keeps_newest_versions_across_instances(tmp_path):
+    first = CrawlArchive(str(tmp_path))
+    second = CrawlArchive(str(tmp_path))
+    for version in range(3):
+        first.put(_page("https://a.example/", 100.0 + version, f"a{version}"))
+        second.put(_page("https://b.example/", 100.0 + version, f"b{version}"))
+    # Map the pre-compaction segments in the second instance
+    assert second.get("https://a.example/")["html"] == "a2"
+
+    result = first.compact(keep_versions=1)
+    assert result["records_before"] == 6
+    assert result["records_after"] == 2
+    assert result["bytes_after"] < result["bytes_before"]
+
+    assert second.get("https://a.example/")["html"] == "a2"
+    assert second.get("https://b.example/")["html"] == "b2"
+    assert len(second.versions("https://b.example/")) == 1
+    second.put(_page("https://c.example/", 300.0, "c"))
+    assert first.get("https://c.example/")["html"] == "c"
+    assert first.stats()["records"] == 3
+    first.close()
+    second.close()
+
+
+def test_compact_keeps_everything_after_cutoff(tmp_path):
+    archive = CrawlArchive(str(tmp_path))
+    for version in range(4):
+        archive.put(_page("https://a.example/", 100.0 + version, f"v{version}"))
+    archive.compact(keep_versions=1, before=102.0)
+    assert [e.fetched_at for e in archive.versions("https://a.example/")] == [102.0, 103.0]
+    archive.close()
+
+
+def test_reopened_archive_reads_existing_records(tmp_path):
+    archive = CrawlArchive(str(tmp_path))
+    archive.put(_page("https://a.example/", 100.0, "kept"))
+    archive.close()
+    assert CrawlArchive(str(tmp_path)).get("https://a.example/")["html"] == "kept"
+
+
+def test_compact_refuses_to_drop_every_version(tmp_path):
+    archive = CrawlArchive(str(tmp_path))
+    archive.put(_page("https://a.example/", 100.0))
+    with pytest.raises(ValueError):
+        archive.compact(keep_versions=0)
+    assert archive.stats()["records"] == 1
+    archive.close()
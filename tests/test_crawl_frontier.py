@@ -0,0 +1,93 @@
+from crawl_frontier import OUTLINK_PRIORITY, PAGINATION_PRIORITY, CrawlFrontier, normalize_url
+
+
+def test_normalize_url_drops_noise():
+    assert normalize_url("HTTPS://Example.com:443/a/?utm_source=x&b=2&a=1#top") == "https://example.com/a?a=1&b=2"
+
+
+def test_pagination_pops_before_outlinks_and_visited_are_skipped():
+    frontier = CrawlFrontier()
+    frontier.add("https://a.example/about", priority=OUTLINK_PRIORITY)
+    frontier.add("https://a.example/list?page=2", priority=PAGINATION_PRIORITY)
+    frontier.add("https://a.example/contact", priority=OUTLINK_PRIORITY)
+    frontier.mark_visited("https://a.example/contact")
+
+    assert frontier.pop().url == "https://a.example/list?page=2"
+    assert frontier.pop().url == "https://a.example/about"
+    assert frontier.pop() is None
+
+
+def test_limits():
+    frontier = CrawlFrontier(max_depth=1, max_pages_per_host=2)
+    assert not frontier.add("https://a.example/deep", depth=2)
+    assert frontier.mark_visited("https://a.example/1")
+    assert frontier.mark_visited("https://a.example/2")
+    assert not frontier.allows("https://a.example/3")
+    assert not frontier.add("https://a.example/3")
+    assert frontier.allows("https://b.example/1")
+
+
+def test_replay_after_restart(tmp_path):
+    log = str(tmp_path / "frontier.jsonl")
+    frontier = CrawlFrontier(log)
+    frontier.add("https://a.example/list?page=2", depth=1, priority=PAGINATION_PRIORITY)
+    frontier.add("https://a.example/about", depth=1)
+    frontier.mark_visited("https://a.example/")
+    frontier.mark_visited("https://a.example/list?page=2")
+    frontier.close()
+
+    resumed = CrawlFrontier(log)
+    assert resumed.visited_count == 2
+    assert resumed.last_visited == "https://a.example/list?page=2"
+    assert resumed.is_visited("https://a.example/list?page=2&utm_medium=email")
+    assert not resumed.mark_visited("https://a.example/")
+    assert not resumed.add("https://a.example/about")
+    entry = resumed.pop()
+    assert (entry.url, entry.depth) == ("https://a.example/about", 1)
+    assert resumed.pop() is None
+    resumed.close()
+
+
+def test_revisits_do_not_grow_the_log(tmp_path):
+    log = tmp_path / "frontier.jsonl"
+    frontier = CrawlFrontier(str(log))
+    frontier.mark_visited("https://a.example/")
+    size = log.stat().st_size
+    for _ in range(10):
+        assert not frontier.mark_visited("https://a.example/")
+    assert log.stat().st_size == size
+    frontier.close()
+
+
+def test_torn_final_line_is_ignored(tmp_path):
+    log = tmp_path / "frontier.jsonl"
+    frontier = CrawlFrontier(str(log))
+    frontier.mark_visited("https://a.example/")
+    frontier.close()
+    with open(log, "a", encoding="utf-8") as fh:
+        fh.write('{"op": "visit", "url": "https://a.exa')
+    assert CrawlFrontier(str(log)).visited_count == 1
+
+
+def test_malformed_urls_are_rejected():
+    frontier = CrawlFrontier()
+    for url in ("http://a.example:99999/", "http://a.example:abc/", "http://[::1/"):
+        assert not frontier.add(url)
+        assert not frontier.mark_visited(url)
+        assert not frontier.is_visited(url)
+        assert not frontier.allows(url)
+    assert frontier.add("https://a.example/ok")
+    assert frontier.visited_count == 0
+
+
+def test_clear_resets_state_and_log(tmp_path):
+    log = tmp_path / "frontier.jsonl"
+    frontier = CrawlFrontier(str(log), max_pages_per_host=1)
+    frontier.add("https://a.example/next")
+    frontier.mark_visited("https://a.example/")
+    frontier.clear()
+    assert (frontier.visited_count, len(frontier), frontier.last_visited) == (0, 0, None)
+    assert frontier.allows("https://a.example/next")
+    assert frontier.mark_visited("https://a.example/")
+    frontier.close()
+    assert CrawlFrontier(str(log)).visited_count == 1
@@ -0,0 +1,58 @@
+from driver_trace import UNATTRIBUTED, DriverTracer, traced
+
+
+class FakeDriver:
+    def __init__(self):
+        self.commands = []
+
+    def execute(self, driver_command, params=None):
+        self.commands.append(driver_command)
+        return {"value": "ok"}
+
+
+class Behavior:
+    def __init__(self, driver, tracer):
+        self.driver = driver
+        self.tracer = tracer
+
+    @traced
+    def scroll(self):
+        self.driver.execute("executeScript", {"script": "window.scrollBy(0, 100);"})
+
+
+def _commands(tracer):
+    return [e for e in tracer.chrome_trace()["traceEvents"] if e["cat"] == "webdriver"]
+
+
+def test_only_commands_inside_traced_methods_are_recorded():
+    driver = FakeDriver()
+    tracer = DriverTracer()
+    tracer.attach(driver)
+    behavior = Behavior(driver, tracer)
+
+    for _ in range(5):
+        driver.execute("screenshot")
+    behavior.scroll()
+
+    assert driver.commands == ["screenshot"] * 5 + ["executeScript"]
+    assert [(e["name"], e["args"]["method"]) for e in _commands(tracer)] == [("executeScript", "scroll")]
+    assert tracer.unattributed_skipped == 5
+    assert list(tracer.summary()) == ["scroll"]
+
+
+def test_unattributed_commands_can_be_recorded():
+    driver = FakeDriver()
+    tracer = DriverTracer(record_unattributed=True)
+    tracer.attach(driver)
+    driver.execute("screenshot")
+    assert [e["args"]["method"] for e in _commands(tracer)] == [UNATTRIBUTED]
+    assert tracer.unattributed_skipped == 0
+
+
+def test_detach_restores_execute():
+    driver = FakeDriver()
+    tracer = DriverTracer()
+    tracer.attach(driver)
+    tracer.detach()
+    assert "execute" not in driver.__dict__
+    assert not tracer.attached
@@ -0,0 +1,34 @@
+import os
+
+from frame_recorder import FrameRecorder
+
+
+def test_dedup_events_and_replay(tmp_path):
+    recorder = FrameRecorder(str(tmp_path))
+    recorder.observe_state({"current_url": "https://a.example/", "last_action": "idle"}, ts=1.0)
+    assert recorder.record_frame(b"frame-1", ts=1.0)
+    recorder.record_frame(b"frame-1", ts=2.0)
+    recorder.observe_state({"current_url": "https://a.example/", "last_action": "scrolling"}, ts=3.0)
+    recorder.record_frame(b"frame-2", ts=3.0)
+    recorder.close()
+
+    reopened = FrameRecorder(str(tmp_path))
+    frames = list(reopened.iter_frames())
+    assert [(ts, jpeg) for ts, jpeg, _ in frames] == [(1.0, b"frame-1"), (3.0, b"frame-2")]
+    assert [event["value"] for event in frames[1][2]] == ["scrolling"]
+    assert [ts for ts, _, _ in reopened.iter_frames(start=2.0)] == [3.0]
+    reopened.close()
+
+
+def test_oldest_segments_are_evicted_over_budget(tmp_path):
+    recorder = FrameRecorder(str(tmp_path), segment_max_bytes=1024, disk_budget_bytes=4096)
+    for i in range(40):
+        recorder.record_frame(os.urandom(300) + bytes([i]), ts=float(i))
+    recorder.close()
+
+    reopened = FrameRecorder(str(tmp_path), segment_max_bytes=1024, disk_budget_bytes=4096)
+    stats = reopened.stats()
+    assert stats["bytes"] <= 4096 + 1024
+    timestamps = [ts for ts, _, _ in reopened.iter_frames()]
+    assert timestamps and timestamps[-1] == 39.0 and timestamps[0] > 0.0
+    reopened.close()
@@ -0,0 +1,68 @@
+import time
+
+import pytest
+
+from human_behavior import HumanBehavior
+from human_timing import PROFILES
+
+
+class FakeDriver:
+    """Just enough of a WebDriver for the scrolling actions."""
+
+    current_url = "https://a.example/"
+
+    def __init__(self, page_height=20_000, viewport_height=800):
+        self.page_height = page_height
+        self.viewport_height = viewport_height
+        self.offset = 0
+
+    def execute_script(self, script, *args):
+        if script == "return window.innerHeight;":
+            return self.viewport_height
+        if script == "return window.pageYOffset;":
+            return self.offset
+        if script == "return document.body.scrollHeight;":
+            return self.page_height
+        if script.startswith("window.scrollTo(0, "):
+            self.offset = float(script[len("window.scrollTo(0, "):-2])
+        elif script.startswith("window.scrollBy(0, "):
+            self.offset += float(script[len("window.scrollBy(0, "):-2])
+        return None
+
+
+@pytest.fixture
+def sleeps(monkeypatch):
+    calls = []
+    monkeypatch.setattr(time, "sleep", calls.append)
+    return calls
+
+
+def _run(profile, seed=7):
+    human = HumanBehavior(FakeDriver(), profile=profile, seed=seed)
+    human.scroll_down_slowly(num_scrolls=3)
+    human.random_delay(0.5, 1.5)
+    return human
+
+
+def test_same_seed_gives_identical_delays(sleeps):
+    _run("fast")
+    first = list(sleeps)
+    sleeps.clear()
+    _run("fast")
+    assert first and sleeps == first
+
+
+def test_virtual_profile_never_sleeps(sleeps):
+    human = _run("virtual")
+    assert sleeps == []
+    assert human.simulated_seconds > 0
+    assert human.clock.now() == pytest.approx(human.simulated_seconds)
+
+
+def test_fast_profile_scales_human_delays(sleeps):
+    _run("human")
+    human_sleeps = list(sleeps)
+    sleeps.clear()
+    _run("fast")
+    scale = PROFILES["fast"].delay_scale
+    assert sleeps == pytest.approx([seconds * scale for seconds in human_sleeps])
@@ -0,0 +1,38 @@
+import time
+
+import pytest
+
+from human_timing import PROFILES, RealClock, VirtualClock, get_profile
+
+
+@pytest.fixture
+def sleeps(monkeypatch):
+    calls = []
+    monkeypatch.setattr(time, "sleep", calls.append)
+    return calls
+
+
+def test_real_clock_sleeps_and_skips_non_positive(sleeps):
+    clock = RealClock()
+    clock.sleep(0.25)
+    clock.sleep(0)
+    clock.sleep(-1)
+    assert sleeps == [0.25]
+
+
+def test_virtual_clock_advances_without_sleeping(sleeps):
+    clock = VirtualClock()
+    clock.sleep(1.5)
+    clock.sleep(0.5)
+    assert clock.now() == 2.0
+    assert sleeps == []
+
+
+def test_profiles():
+    assert isinstance(PROFILES["virtual"].make_clock(), VirtualClock)
+    assert isinstance(PROFILES["fast"].make_clock(), RealClock)
+    assert 0 < PROFILES["fast"].delay_scale < 1
+    assert get_profile("virtual", seed=5).seed == 5
+    assert get_profile("human", seed=3).make_rng().random() == get_profile("human", seed=3).make_rng().random()
+    with pytest.raises(ValueError):
+        get_profile("slow")
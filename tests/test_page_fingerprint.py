@@ -0,0 +1,123 @@
+import random
+
+from page_fingerprint import DEFAULT_MAX_DISTANCE, DuplicateIndex, Fingerprint, band_layout, fingerprint, hamming
+
+
+VOCAB = [f"word{i}" for i in range(2000)]
+ZIPF = [1 / (i + 1) for i in range(len(VOCAB))]
+
+
+def _page(rng, words=400):
+    return rng.choices(VOCAB, ZIPF, k=words)
+
+
+def _rotate_ad(rng, words, length=10):
+    changed = list(words)
+    start = rng.randrange(0, len(words) - length)
+    changed[start:start + length] = _page(rng, length)
+    return changed
+
+
+def test_default_distance_flags_rotated_ads_and_not_unrelated_pages():
+    rng = random.Random(0)
+    trials = 200
+    near = far = 0
+    closest_unrelated = 64
+    for _ in range(trials):
+        page = _page(rng)
+        base = fingerprint(text=" ".join(page)).simhash
+        rotated = fingerprint(text=" ".join(_rotate_ad(rng, page))).simhash
+        other = fingerprint(text=" ".join(_page(rng))).simhash
+        near += hamming(base, rotated) <= DEFAULT_MAX_DISTANCE
+        far += hamming(base, other) <= DEFAULT_MAX_DISTANCE
+        closest_unrelated = min(closest_unrelated, hamming(base, other))
+    assert near / trials >= 0.95
+    assert far == 0
+    assert closest_unrelated > DEFAULT_MAX_DISTANCE + 3
+
+
+def test_exact_near_and_unique_matches():
+    rng = random.Random(1)
+    page = _page(rng)
+    index = DuplicateIndex()
+
+    first = index.check("https://a.example/list?page=1", fingerprint(text=" ".join(page)))
+    alias = index.check("https://a.example/list", fingerprint(text=" ".join(page)))
+    rotated = index.check("https://a.example/list?page=2", fingerprint(text=" ".join(_rotate_ad(rng, page))))
+    other = index.check("https://a.example/other", fingerprint(text=" ".join(_page(rng))))
+
+    assert not first["duplicate"]
+    assert alias["kind"] == "exact" and alias["of"] == "https://a.example/list?page=1"
+    assert rotated["kind"] == "near" and rotated["distance"] <= DEFAULT_MAX_DISTANCE
+    assert not other["duplicate"]
+
+    domain = index.stats()["domains"]["a.example"]
+    assert domain == {"pages": 4, "exact_duplicates": 1, "near_duplicates": 1, "duplicate_rate": 0.5}
+
+
+def test_near_matches_stay_within_a_domain():
+    rng = random.Random(2)
+    page = _page(rng)
+    index = DuplicateIndex()
+    index.check("https://a.example/1", fingerprint(text=" ".join(page)))
+    match = index.check("https://b.example/1", fingerprint(text=" ".join(_rotate_ad(rng, page))))
+    assert not match["duplicate"]
+
+
+def test_short_pages_keep_exact_matches_after_recheck_and_eviction():
+    soft_404 = fingerprint(html="<html><body><h1>Page not found</h1></body></html>")
+    index = DuplicateIndex(max_entries=2)
+    index.check("https://a.example/missing-1", soft_404)
+    index.check("https://a.example/missing-2", soft_404)
+
+    # Re-checking the first URL must not forget that missing-2 shares its hash
+    assert index.check("https://a.example/missing-1", soft_404)["of"] == "https://a.example/missing-2"
+    # missing-2 is evicted next; missing-1 still carries the hash
+    index.check("https://a.example/missing-3", soft_404)
+    match = index.check("https://a.example/missing-4", soft_404)
+    assert match["kind"] == "exact"
+
+
+def test_rechecking_the_same_url_is_not_a_duplicate():
+    index = DuplicateIndex()
+    fp = fingerprint(text="same content " * 30)
+    index.check("https://a.example/", fp)
+    assert not index.check("https://a.example/?utm_source=feed", fp)["duplicate"]
+
+
+def test_band_lookup_finds_matches_at_exactly_max_distance():
+    rng = random.Random(3)
+    base = rng.getrandbits(64)
+    # Spread ten flipped bits 3/3/2/2 over the bands: no band matches exactly
+    near = base
+    for (shift, _), flipped in zip(band_layout(), (3, 3, 2, 2)):
+        for bit in range(flipped):
+            near ^= 1 << (shift + bit)
+    too_far = near ^ (1 << 15)
+
+    index = DuplicateIndex()
+    for i in range(500):
+        index.check(f"https://a.example/other-{i}", Fingerprint(f"o{i}", rng.getrandbits(64), 400))
+    index.check("https://a.example/base", Fingerprint("base", base, 400))
+
+    assert hamming(base, near) == DEFAULT_MAX_DISTANCE
+    match = index.check("https://a.example/near", Fingerprint("near", near, 400), record=False)
+    assert (match["kind"], match["of"], match["distance"]) == ("near", "https://a.example/base", 10)
+    assert hamming(base, too_far) == DEFAULT_MAX_DISTANCE + 1
+    miss = index.check("https://a.example/far", Fingerprint("far", too_far, 400), record=False)
+    assert miss["of"] != "https://a.example/base"
+
+
+def test_evicted_pages_leave_the_band_tables():
+    index = DuplicateIndex(max_entries=1)
+    index.check("https://a.example/1", Fingerprint("a", 0, 400))
+    index.check("https://b.example/1", Fingerprint("b", 0, 400))
+    assert not index.check("https://a.example/2", Fingerprint("c", 1, 400))["duplicate"]
+    assert set(index._bands) == {"a.example"}
+
+
+def test_malformed_url_is_still_checked():
+    index = DuplicateIndex()
+    fp = fingerprint(text="same content " * 30)
+    index.check("http://a.example:99999/", fp)
+    assert index.check("http://a.example/", fp)["of"] == "http://a.example:99999/"
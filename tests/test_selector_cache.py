@@ -0,0 +1,41 @@
+from selector_cache import SelectorCache
+
+
+LOCATOR = [("css selector", ".pagination"), ("css selector", "a[rel='next']")]
+
+
+def test_learned_locator_survives_restart(tmp_path):
+    path = str(tmp_path / "cache.json")
+    cache = SelectorCache(path)
+    cache.learn("a.example", "pagination", LOCATOR)
+    cache.record_hit("a.example")
+    cache.flush()
+
+    reloaded = SelectorCache(path)
+    assert reloaded.lookup("a.example") == ("pagination", LOCATOR)
+    assert reloaded.stats()["domains"]["a.example"]["hits"] == 1
+
+
+def test_consecutive_misses_invalidate_and_hits_reset_the_count():
+    cache = SelectorCache(max_failures=2)
+    cache.learn("a.example", "pagination", LOCATOR)
+    cache.record_miss("a.example")
+    cache.record_hit("a.example")
+    cache.record_miss("a.example")
+    assert cache.lookup("a.example") is not None
+
+    cache.record_miss("a.example")
+    assert cache.lookup("a.example") is None
+    stats = cache.stats()
+    assert stats["invalidated"] == 1
+    assert stats["hit_rate"] == 0.25
+
+
+def test_forget():
+    cache = SelectorCache()
+    cache.learn("a.example", "text", [("xpath", "//a")])
+    cache.learn("b.example", "text", [("xpath", "//a")])
+    cache.forget("a.example")
+    assert cache.lookup("a.example") is None
+    cache.forget()
+    assert cache.lookup("b.example") is None
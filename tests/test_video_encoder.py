@@ -0,0 +1,163 @@
+import io
+import os
+import queue
+import struct
+import threading
+import time
+
+import video_encoder
+from video_encoder import VideoEncoder, _StreamReader
+
+
+def _box(box_type, payload):
+    return struct.pack(">I4s", 8 + len(payload), box_type) + payload
+
+
+def _element(element_id, payload):
+    return element_id + bytes([0x80 | len(payload)]) + payload
+
+
+def _attach(encoder, generation=0, size=32):
+    viewer = queue.Queue(maxsize=size)
+    encoder._viewers[viewer] = generation
+    return viewer
+
+
+def _drain(viewer):
+    items = []
+    while not viewer.empty():
+        items.append(viewer.get_nowait())
+    return items
+
+
+def test_mp4_init_segment_and_fragments():
+    encoder = VideoEncoder(lambda: b"", fmt="mp4")
+    viewer = _attach(encoder)
+    init = _box(b"ftyp", b"isom") + _box(b"moov", b"x" * 20)
+    first = _box(b"moof", b"a") + _box(b"mdat", b"bb")
+    second = _box(b"moof", b"c") + _box(b"mdat", b"dd")
+    # 64-bit box size
+    large = struct.pack(">I4sQ", 1, b"moof", 17) + b"e" + _box(b"mdat", b"ff")
+
+    try:
+        encoder._read_mp4(_StreamReader(io.BytesIO(init + first + second + large)), 0)
+    except EOFError:
+        pass
+    assert encoder._init_segment == init
+    assert _drain(viewer) == [first, second, large]
+
+
+def test_webm_init_segment_and_clusters():
+    encoder = VideoEncoder(lambda: b"", fmt="webm")
+    viewer = _attach(encoder)
+    header = _element(b"\x1a\x45\xdf\xa3", b"hdr")
+    segment = b"\x18\x53\x80\x67" + b"\x01" + b"\xff" * 7
+    tracks = _element(b"\x15\x49\xa9\x66", b"info") + _element(b"\x16\x54\xae\x6b", b"trk")
+    sized = _element(b"\x1f\x43\xb6\x75", b"cluster1")
+    unsized = b"\x1f\x43\xb6\x75" + b"\x01" + b"\xff" * 7 + b"unknown-size"
+
+    stream = header + segment + tracks + sized + unsized + sized
+    try:
+        encoder._read_webm(_StreamReader(io.BufferedReader(io.BytesIO(stream))), 0)
+    except EOFError:
+        pass
+    assert encoder._init_segment == header + segment + tracks
+    assert _drain(viewer) == [sized, unsized, sized]
+
+
+def test_full_queue_still_receives_end_of_stream():
+    encoder = VideoEncoder(lambda: b"")
+    viewer = _attach(encoder, size=2)
+    for chunk in (b"a", b"b", b"c"):
+        encoder._broadcast(chunk, 0)
+    assert encoder.fragments_dropped == 1
+
+    encoder._broadcast(None, 0)
+    assert _drain(viewer)[-1] is None
+    assert viewer not in encoder._viewers
+
+
+def test_broadcast_only_reaches_viewers_of_that_generation():
+    encoder = VideoEncoder(lambda: b"")
+    old = _attach(encoder, generation=1)
+    new = _attach(encoder, generation=2)
+    encoder._broadcast(b"late fragment from old process", 1)
+    encoder._broadcast(b"fragment", 2)
+    assert _drain(old) == [b"late fragment from old process"]
+    assert _drain(new) == [b"fragment"]
+
+    encoder._broadcast(None, 1)
+    assert _drain(old) == [None]
+    assert list(encoder._viewers.values()) == [2]
+
+
+def test_stale_init_segment_is_ignored():
+    encoder = VideoEncoder(lambda: b"")
+    encoder._generation = 2
+    encoder._set_init(b"old", 1)
+    assert encoder._init_segment is None
+    encoder._set_init(b"new", 2)
+    assert encoder._init_segment == b"new"
+
+
+def test_stream_yields_init_then_fragments_until_end(monkeypatch):
+    encoder = VideoEncoder(lambda: b"")
+    monkeypatch.setattr(encoder, "_ensure_running", lambda: None)
+    encoder._set_init(b"init", 0)
+    chunks = encoder.stream()
+    assert next(chunks) == b"init"
+
+    def produce():
+        encoder._broadcast(b"frag", 0)
+        encoder._broadcast(None, 0)
+
+    threading.Thread(target=produce).start()
+    assert list(chunks) == [b"frag"]
+    assert not encoder._viewers
+
+
+class _FakeProcess:
+    """Popen stand-in whose output never ends until ``finish()``."""
+
+    def __init__(self, *args, **kwargs):
+        self.stdin = io.BytesIO()
+        read_fd, self._write_fd = os.pipe()
+        self.stdout = os.fdopen(read_fd, "rb", buffering=0)
+        self.stderr = io.BytesIO()
+        self.returncode = None
+
+    def poll(self):
+        return self.returncode
+
+    def finish(self):
+        self.returncode = 0
+        os.close(self._write_fd)
+
+
+def test_viewer_joining_an_idle_encoder_gets_a_new_process(monkeypatch):
+    processes = []
+
+    def popen(*args, **kwargs):
+        processes.append(_FakeProcess())
+        return processes[-1]
+
+    monkeypatch.setattr(video_encoder, "ffmpeg_available", lambda binary: True)
+    monkeypatch.setattr(video_encoder.subprocess, "Popen", popen)
+    encoder = VideoEncoder(lambda: b"frame", fps=50, idle_timeout=0.0)
+    with encoder._lock:
+        encoder._ensure_running()
+    first = processes[0]
+
+    # The feed loop sees no viewers, closes stdin and retires the process,
+    # which (like ffmpeg flushing its output) is still running
+    deadline = time.monotonic() + 5
+    while not first.stdin.closed and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert first.stdin.closed and first.poll() is None
+
+    with encoder._lock:
+        encoder._ensure_running()
+    assert len(processes) == 2
+    assert encoder._process is processes[1] and encoder._generation == 2
+    for process in processes:
+        process.finish()
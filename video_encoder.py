@@ -0,0 +1,431 @@
+#!/usr/bin/env python3
+"""
+Inter-frame compressed live stream through a long-lived ffmpeg process.
+
+One :class:`VideoEncoder` per output format is shared by every viewer. A
+feeder thread pulls JPEG frames from the capture function and pipes them to
+ffmpeg (libx264 into fragmented MP4, or libvpx into WebM; CPU only). A
+reader thread splits ffmpeg's output into the init segment and media
+fragments and fans the fragments out to per-viewer queues. Fragments start
+at keyframes, so a late viewer gets the init segment and joins at the next
+fragment. Slow viewers drop fragments instead of stalling the encoder.
+
+Encoder lag is the number of frames written to ffmpeg that it has not yet
+reported as encoded (from ``-progress``), also expressed in seconds.
+
+The encoder starts with the first viewer and stops once nobody has been
+watching for ``idle_timeout`` seconds. MJPEG (``/video_feed``) is unaffected.
+
+Usage:
+    encoder = VideoEncoder(_capture_frame, fmt="mp4", fps=4, keyint_seconds=2)
+    Response(encoder.stream(), mimetype=encoder.mimetype)
+"""
+
+from __future__ import annotations
+
+import io
+import queue
+import shutil
+import struct
+import subprocess
+import threading
+import time
+from typing import Callable, Dict, Iterator, List, Optional
+
+
+FORMATS = {"mp4": "video/mp4", "webm": "video/webm"}
+
+_EBML_HEADER_ID = 0x1A45DFA3
+_SEGMENT_ID = 0x18538067
+_CLUSTER_ID = 0x1F43B675
+_CLUSTER_ID_BYTES = b"\x1f\x43\xb6\x75"
+
+
+class EncoderUnavailable(Exception):
+    """ffmpeg is missing or exited before producing an init segment."""
+
+
+def ffmpeg_available(binary: str = "ffmpeg") -> bool:
+    return shutil.which(binary) is not None
+
+
+class _StreamReader:
+    """Exact-size reads from ffmpeg's stdout; raises EOFError at end of stream."""
+
+    def __init__(self, pipe):
+        self._pipe = pipe
+
+    def read(self, size: int) -> bytes:
+        chunks = []
+        remaining = size
+        while remaining:
+            chunk = self._pipe.read(remaining)
+            if not chunk:
+                raise EOFError
+            chunks.append(chunk)
+            remaining -= len(chunk)
+        return b"".join(chunks)
+
+
+class VideoEncoder:
+    """Shared ffmpeg encoder that serves fMP4 or WebM to any number of viewers."""
+
+    def __init__(
+        self,
+        frame_source: Callable[[], bytes],
+        fmt: str = "mp4",
+        fps: float = 2.0,
+        keyint_seconds: float = 2.0,
+        bitrate_kbps: int = 800,
+        low_latency: bool = True,
+        ffmpeg: str = "ffmpeg",
+        idle_timeout: float = 10.0,
+        viewer_queue_size: int = 32,
+    ):
+        if fmt not in FORMATS:
+            raise ValueError(f"fmt must be one of {', '.join(FORMATS)}")
+        self.frame_source = frame_source
+        self.fmt = fmt
+        self.mimetype = FORMATS[fmt]
+        self.fps = max(0.1, fps)
+        self.keyint = max(1, round(keyint_seconds * self.fps))
+        self.bitrate_kbps = bitrate_kbps
+        self.low_latency = low_latency
+        self.ffmpeg = ffmpeg
+        self.idle_timeout = idle_timeout
+        self.viewer_queue_size = viewer_queue_size
+
+        self._lock = threading.Lock()
+        # viewer queue -> generation of the ffmpeg process it is attached to
+        self._viewers: Dict[queue.Queue, int] = {}
+        self._generation = 0
+        self._process: Optional[subprocess.Popen] = None
+        self._init_segment: Optional[bytes] = None
+        self._init_ready = threading.Event()
+        self._stopping = threading.Event()
+        self._last_viewer_at = time.monotonic()
+
+        self.frames_written = 0
+        self.frames_encoded = 0
+        self.fragments_out = 0
+        self.bytes_out = 0
+        self.fragments_dropped = 0
+        self.restarts = 0
+        self.last_error: Optional[str] = None
+
+    # ------------------------------------------------------------------ #
+    # Process management
+    # ------------------------------------------------------------------ #
+
+    def command(self) -> List[str]:
+        gop = str(self.keyint)
+        rate = f"{self.bitrate_kbps}k"
+        cmd = [
+            self.ffmpeg, "-hide_banner", "-loglevel", "error", "-nostats",
+            "-progress", "pipe:2", "-stats_period", "0.5",
+            "-f", "image2pipe", "-c:v", "mjpeg", "-framerate", f"{self.fps:g}", "-i", "pipe:0",
+            "-an", "-vf", "scale=trunc(iw/2)*2:trunc(ih/2)*2", "-pix_fmt", "yuv420p",
+            "-g", gop, "-keyint_min", gop,
+            "-b:v", rate, "-maxrate", rate, "-bufsize", f"{self.bitrate_kbps * 2}k",
+        ]
+        if self.fmt == "mp4":
+            cmd += ["-c:v", "libx264", "-preset", "veryfast", "-sc_threshold", "0"]
+            if self.low_latency:
+                cmd += ["-tune", "zerolatency"]
+            cmd += ["-f", "mp4", "-movflags", "frag_keyframe+empty_moov+default_base_moof"]
+        else:
+            cmd += ["-c:v", "libvpx", "-auto-alt-ref", "0"]
+            if self.low_latency:
+                cmd += ["-deadline", "realtime", "-cpu-used", "8", "-lag-in-frames", "0"]
+            cmd += [
+                "-f", "webm", "-live", "1",
+                "-cluster_time_limit", str(int(self.keyint / self.fps * 1000)),
+            ]
+        return cmd + ["pipe:1"]
+
+    def _ensure_running(self) -> None:
+        """Start ffmpeg and its threads if they are not running. Caller holds the lock."""
+        if self._process is not None and self._process.poll() is None:
+            return
+        if not ffmpeg_available(self.ffmpeg):
+            raise EncoderUnavailable(f"{self.ffmpeg} not found on PATH")
+        if self._process is not None:
+            self.restarts += 1
+        # Viewers of a previous process only have its init segment; end their streams
+        for viewer in list(self._viewers):
+            del self._viewers[viewer]
+            self._end(viewer)
+        self._generation += 1
+        self._init_segment = None
+        self._init_ready.clear()
+        self._stopping.clear()
+        self.frames_written = self.frames_encoded = 0
+        process = subprocess.Popen(
+            self.command(),
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            bufsize=0,
+        )
+        self._process = process
+        threading.Thread(target=self._feed_loop, args=(process,), daemon=True).start()
+        threading.Thread(target=self._read_loop, args=(process, self._generation), daemon=True).start()
+        threading.Thread(target=self._progress_loop, args=(process,), daemon=True).start()
+
+    def stop(self) -> None:
+        with self._lock:
+            process, self._process = self._process, None
+            self._stopping.set()
+        if process is not None:
+            try:
+                process.stdin.close()
+            except OSError:
+                pass
+            try:
+                process.wait(timeout=5)
+            except subprocess.TimeoutExpired:
+                process.kill()
+
+    # ------------------------------------------------------------------ #
+    # Worker threads
+    # ------------------------------------------------------------------ #
+
+    def _feed_loop(self, process: subprocess.Popen) -> None:
+        interval = 1.0 / self.fps
+        next_at = time.monotonic()
+        while not self._stopping.is_set() and process.poll() is None:
+            with self._lock:
+                idle = not self._viewers and time.monotonic() - self._last_viewer_at > self.idle_timeout
+                if idle:
+                    self._retire(process)
+            if idle:
+                break
+            try:
+                frame = self.frame_source()
+                process.stdin.write(frame)
+                self.frames_written += 1
+            except (BrokenPipeError, ValueError):
+                break
+            except Exception as e:
+                self.last_error = f"frame source: {e}"
+            next_at += interval
+            time.sleep(max(0.0, next_at - time.monotonic()))
+            next_at = max(next_at, time.monotonic() - interval)
+        try:
+            process.stdin.close()
+        except OSError:
+            pass
+
+    def _retire(self, process: subprocess.Popen) -> None:
+        """
+        Stop handing ``process`` to new viewers. Caller holds the lock.
+
+        ffmpeg keeps running until it has flushed its output after stdin
+        closes; a viewer joining in that window starts a new generation
+        instead of receiving only the dying one's init segment.
+        """
+        if self._process is process:
+            self._process = None
+
+    def _progress_loop(self, process: subprocess.Popen) -> None:
+        for raw in process.stderr:
+            line = raw.decode("utf-8", "replace").strip()
+            key, sep, value = line.partition("=")
+            if not sep:
+                if line:
+                    self.last_error = line
+                continue
+            # A retired process still reports progress while it drains
+            if key == "frame" and value.isdigit() and self._process is process:
+                self.frames_encoded = int(value)
+
+    def _read_loop(self, process: subprocess.Popen, generation: int) -> None:
+        # stdout is unbuffered (bufsize=0); buffer it so small EBML reads aren't one syscall each
+        reader = _StreamReader(io.BufferedReader(process.stdout))
+        try:
+            if self.fmt == "mp4":
+                self._read_mp4(reader, generation)
+            else:
+                self._read_webm(reader, generation)
+        except EOFError:
+            pass
+        except Exception as e:
+            self.last_error = f"demux: {e}"
+        finally:
+            with self._lock:
+                if self._generation == generation:
+                    self._init_ready.set()
+                if self._process is process:
+                    self._process = None
+            self._broadcast(None, generation)
+
+    def _set_init(self, data: bytes, generation: int) -> None:
+        with self._lock:
+            if self._generation != generation:
+                return
+            self._init_segment = data
+            self._init_ready.set()
+
+    def _read_mp4(self, reader: _StreamReader, generation: int) -> None:
+        """ftyp+moov form the init segment; each moof+mdat pair is one fragment."""
+        init: List[bytes] = []
+        fragment: List[bytes] = []
+        while True:
+            header = reader.read(8)
+            size, box_type = struct.unpack(">I4s", header)
+            if size == 1:
+                extended = reader.read(8)
+                header += extended
+                size = struct.unpack(">Q", extended)[0]
+            box = header + reader.read(size - len(header))
+
+            if self._init_segment is None:
+                if box_type == b"moof":
+                    self._set_init(b"".join(init), generation)
+                else:
+                    init.append(box)
+                    continue
+            fragment.append(box)
+            if box_type == b"mdat":
+                self._broadcast(b"".join(fragment), generation)
+                fragment = []
+
+    @staticmethod
+    def _read_vint(reader: _StreamReader, keep_marker: bool) -> tuple:
+        first = reader.read(1)
+        length = 1
+        while length <= 8 and not first[0] & (0x80 >> (length - 1)):
+            length += 1
+        if length > 8:
+            raise ValueError("invalid EBML variable-length integer")
+        raw = first + (reader.read(length - 1) if length > 1 else b"")
+        value = int.from_bytes(raw, "big")
+        if not keep_marker:
+            value &= (1 << (7 * length)) - 1
+        unknown = not keep_marker and value == (1 << (7 * length)) - 1
+        return value, raw, unknown
+
+    def _read_webm(self, reader: _StreamReader, generation: int) -> None:
+        """EBML header + Segment head + Tracks form the init segment; Clusters are fragments."""
+        init: List[bytes] = []
+        pending = b""
+        while True:
+            if pending:
+                element_id, id_raw = _CLUSTER_ID, pending
+                pending = b""
+            else:
+                element_id, id_raw, _ = self._read_vint(reader, keep_marker=True)
+            size, size_raw, unknown = self._read_vint(reader, keep_marker=False)
+            head = id_raw + size_raw
+
+            if element_id == _SEGMENT_ID:
+                # Live segments have unknown size; descend into the children
+                init.append(head)
+                continue
+
+            if element_id != _CLUSTER_ID:
+                if unknown:
+                    raise ValueError(f"unknown-size element 0x{element_id:X}")
+                element = head + reader.read(size)
+                if self._init_segment is None:
+                    init.append(element)
+                continue
+
+            if self._init_segment is None:
+                self._set_init(b"".join(init), generation)
+
+            if not unknown:
+                self._broadcast(head + reader.read(size), generation)
+                continue
+
+            # Unknown-size cluster: it runs until the next Cluster ID
+            body = bytearray(head)
+            while True:
+                body += reader.read(1)
+                if body.endswith(_CLUSTER_ID_BYTES) and len(body) > len(head) + 4:
+                    del body[-4:]
+                    pending = _CLUSTER_ID_BYTES
+                    break
+            self._broadcast(bytes(body), generation)
+
+    @staticmethod
+    def _end(viewer: queue.Queue) -> None:
+        """Deliver the end-of-stream marker, discarding queued fragments if the queue is full."""
+        while True:
+            try:
+                viewer.put_nowait(None)
+                return
+            except queue.Full:
+                try:
+                    viewer.get_nowait()
+                except queue.Empty:
+                    pass
+
+    def _broadcast(self, chunk: Optional[bytes], generation: int) -> None:
+        """Fan a fragment out to this generation's viewers; ``None`` ends and detaches them."""
+        with self._lock:
+            viewers = [viewer for viewer, gen in self._viewers.items() if gen == generation]
+            if chunk is None:
+                for viewer in viewers:
+                    del self._viewers[viewer]
+        if chunk is None:
+            for viewer in viewers:
+                self._end(viewer)
+            return
+        self.fragments_out += 1
+        self.bytes_out += len(chunk) * len(viewers)
+        for viewer in viewers:
+            try:
+                viewer.put_nowait(chunk)
+            except queue.Full:
+                # Fragments start at keyframes, so skipping one only skips time
+                self.fragments_dropped += 1
+
+    # ------------------------------------------------------------------ #
+    # Viewers
+    # ------------------------------------------------------------------ #
+
+    def stream(self, init_timeout: float = 15.0) -> Iterator[bytes]:
+        """Yield the init segment, then live fragments until the encoder stops."""
+        viewer: queue.Queue = queue.Queue(maxsize=self.viewer_queue_size)
+        with self._lock:
+            self._ensure_running()
+            self._viewers[viewer] = self._generation
+            self._last_viewer_at = time.monotonic()
+        try:
+            if not self._init_ready.wait(init_timeout) or self._init_segment is None:
+                raise EncoderUnavailable(self.last_error or "encoder produced no init segment")
+            yield self._init_segment
+            while True:
+                chunk = viewer.get()
+                if chunk is None:
+                    break
+                yield chunk
+        finally:
+            with self._lock:
+                self._viewers.pop(viewer, None)
+                self._last_viewer_at = time.monotonic()
+
+    def stats(self) -> dict:
+        with self._lock:
+            running = self._process is not None and self._process.poll() is None
+            viewers = len(self._viewers)
+        lag_frames = max(0, self.frames_written - self.frames_encoded) if running else 0
+        return {
+            "format": self.fmt,
+            "running": running,
+            "viewers": viewers,
+            "fps": self.fps,
+            "keyint_frames": self.keyint,
+            "bitrate_kbps": self.bitrate_kbps,
+            "low_latency": self.low_latency,
+            "frames_written": self.frames_written,
+            "frames_encoded": self.frames_encoded,
+            "lag_frames": lag_frames,
+            "lag_seconds": round(lag_frames / self.fps, 3),
+            "fragments_out": self.fragments_out,
+            "fragments_dropped": self.fragments_dropped,
+            "bytes_out": self.bytes_out,
+            "restarts": self.restarts,
+            "last_error": self.last_error,
+        }